@@ -0,0 +1,76 @@
+from typing import Optional, List, Tuple, Iterable, Iterator, Callable
+from functools import partial
+from classes import *
+from linearize_io import linearize_io
+from checker import check
+from utils import iter_test
+import multiprocessing
+import copy
+import tqdm
+
+
+def io_verdict(spec: List[Call]) -> bool:
+    return linearize_io(spec).linearizable
+
+
+def check_verdict(spec: List[Call]) -> bool:
+    return check(spec).linearizable
+
+
+def _verify_case(checker: Callable[[List[Call]], bool], indexed_test: Tuple[int, Tuple[List[Call], bool]]):
+    i, (testcase, res) = indexed_test
+    return i, res ^ checker(testcase)
+
+
+def iter_mismatches(
+        tests: Iterable[Tuple[List[Call], bool]],
+        checker: Callable[[List[Call]], bool] = io_verdict,
+        processes: Optional[int] = None,
+        chunksize: int = 256) -> Iterator[Tuple[int, bool]]:
+    """
+    Streams (test index, verdict differs from the expected one) for every test, in test order.\n
+    The tests are sharded in chunks of chunksize over a pool of processes (all cores by default).
+    Every test is pickled to its worker, or deep copied when processes is 1, so the tests are never modified.\n
+    checker must be a module level function so that it can be sent to the workers.
+    """
+    if processes == 1:
+        for indexed_test in enumerate(tests):
+            yield _verify_case(checker, copy.deepcopy(indexed_test))
+        return
+
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap(partial(_verify_case, checker), enumerate(tests), chunksize=chunksize)
+
+
+def verify_tests(
+        tests: Iterable[Tuple[List[Call], bool]],
+        checker: Callable[[List[Call]], bool] = io_verdict,
+        processes: Optional[int] = None,
+        chunksize: int = 256,
+        total: Optional[int] = None) -> List[int]:
+    """
+    Parallel run_test, returns the sorted indices of the tests where checker disagrees with the expected verdict
+    """
+    wrong_test_no = []
+    for i, mismatch in tqdm.tqdm(iter_mismatches(tests, checker, processes, chunksize), total=total):
+        if mismatch:
+            wrong_test_no.append(i)
+
+    print(f"Tests failed: {len(wrong_test_no)}")
+    if len(wrong_test_no) == 0:
+        print("All tests passed")
+    else:
+        print(f"First failed: {str(wrong_test_no[:10]).strip('[]')} ...")
+
+    return wrong_test_no
+
+
+def verify_file(
+        filename: str,
+        checker: Callable[[List[Call]], bool] = io_verdict,
+        processes: Optional[int] = None,
+        chunksize: int = 256) -> List[int]:
+    """
+    verify_tests over a file in tests/, streamed from disk instead of loaded up front
+    """
+    return verify_tests(iter_test(filename), checker, processes, chunksize)
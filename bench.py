@@ -0,0 +1,181 @@
+from typing import Dict, Optional, List, Any, Tuple, Callable
+from classes import *
+from utils import generate_random_spec, linearize_generic, isAny_fcas_intersect_write_comb
+from linearize_io import linearize_io
+from linearize_wgl import linearize_wgl
+from checker import check
+from online import check_online
+import numpy as np
+import argparse
+import itertools
+import platform
+import tracemalloc
+import random
+import json
+import copy
+import time
+import sys
+
+# engine name -> verdict of a register history
+ENGINES: Dict[str, Callable[[List[Call]], bool]] = {
+    "linearize_io": lambda spec: linearize_io(spec).linearizable,
+    "linearize_wgl": lambda spec: linearize_wgl(spec, StateIO()) is not None,
+    "linearize_generic": lambda spec: linearize_generic(spec, StateIO(), mode="decide"),
+    "check": lambda spec: check(spec).linearizable,
+    "check_online": lambda spec: check_online(spec, StateIO()) is None,
+}
+
+# parameters of generate_random_spec that make a grid point
+GRID_PARAMS = ["n", "m", "p", "ops", "min_offset", "max_offset", "min_duration", "max_duration"]
+
+
+def make_corpus(params: Dict[str, Any], cases: int, seed: int) -> List[List[Call]]:
+    """
+    cases histories of generate_random_spec(**params), the same for the same seed.\n
+    Histories where a false cas intersects a write are skipped, as in utils.generate_tests.
+    """
+    rng_state = random.getstate()
+    random.seed(seed)
+    try:
+        corpus: List[List[Call]] = []
+        while len(corpus) < cases:
+            spec = generate_random_spec(**params)
+            if not isAny_fcas_intersect_write_comb(spec):
+                corpus.append(spec)
+        return corpus
+    finally:
+        random.setstate(rng_state)
+
+
+def bench_engine(engine: Callable[[List[Call]], bool], corpus: List[List[Call]]) -> Dict[str, Any]:
+    """
+    Times engine on every history of the corpus after one warm up run, then runs it again under tracemalloc
+    for the peak memory, so that the timings are not slowed down by the tracing.\n
+    Every run gets its own copy of the history, the copies are not timed.
+    """
+    # untimed first run, so that lazy imports and first call costs do not land in the percentiles
+    if corpus:
+        engine(copy.deepcopy(corpus[0]))
+
+    latencies: List[float] = []
+    linearizable = 0
+    for spec in corpus:
+        spec = copy.deepcopy(spec)
+        t = time.perf_counter()
+        linearizable += engine(spec)
+        latencies.append(time.perf_counter() - t)
+
+    peak = 0
+    tracemalloc.start()
+    try:
+        for spec in corpus:
+            spec = copy.deepcopy(spec)
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            engine(spec)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+
+    total = sum(latencies)
+    ops = sum(len(spec) for spec in corpus)
+    return {
+        "cases": len(corpus),
+        "linearizable": linearizable,
+        "seconds": total,
+        "ops_per_sec": ops / total if total > 0 else float("inf"),
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def run_grid(grid: Dict[str, List[Any]], engines: List[str], cases: int, seed: int, verbose: bool = True) -> List[Dict[str, Any]]:
+    """
+    One result per grid point and engine. Every grid point gets its own corpus, seeded by seed and its position.
+    """
+    results: List[Dict[str, Any]] = []
+    for point_i, values in enumerate(itertools.product(*(grid[name] for name in GRID_PARAMS))):
+        params = dict(zip(GRID_PARAMS, values))
+        corpus = make_corpus(params, cases, seed + point_i)
+        verdicts = set()
+        for name in engines:
+            res = {"params": params, "engine": name, **bench_engine(ENGINES[name], corpus)}
+            verdicts.add(res["linearizable"])
+            results.append(res)
+            if verbose:
+                print(f"{_key(res)}: {res['ops_per_sec']:.0f} ops/s, p50 {res['p50_ms']:.3f} ms, "
+                      f"p99 {res['p99_ms']:.3f} ms, peak {res['peak_kib']:.0f} KiB")
+        if len(verdicts) > 1:
+            print(f"Engines disagree on {params}: {[r['linearizable'] for r in results[-len(engines):]]}")
+    return results
+
+
+def _key(res: Dict[str, Any]) -> str:
+    params = res["params"]
+    return " ".join(f"{name}={','.join(params[name]) if name == 'ops' else params[name]}" for name in GRID_PARAMS) \
+        + f" {res['engine']}"
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float) -> List[str]:
+    """
+    Returns the keys of the results whose throughput dropped or whose p99 latency grew by more than tolerance
+    compared to the baseline. Results without a baseline entry are only reported.
+    """
+    base = {_key(res): res for res in baseline}
+    regressions: List[str] = []
+    for res in results:
+        key = _key(res)
+        if key not in base:
+            print(f"{key}: not in the baseline")
+            continue
+        speed = res["ops_per_sec"] / base[key]["ops_per_sec"]
+        p99 = res["p99_ms"] / base[key]["p99_ms"] if base[key]["p99_ms"] > 0 else 1
+        regressed = speed < 1 - tolerance or p99 > 1 + tolerance
+        print(f"{key}: throughput x{speed:.2f}, p99 x{p99:.2f}{' REGRESSION' if regressed else ''}")
+        if regressed:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the linearizability checkers over a grid of random histories")
+    parser.add_argument("--n", type=int, nargs="+", default=[3], help="number of threads")
+    parser.add_argument("--m", type=int, nargs="+", default=[8], help="number of operations")
+    parser.add_argument("--p", type=int, nargs="+", default=[4], help="number of variables")
+    parser.add_argument("--ops", nargs="+", default=["io,cas"], help="comma separated operations, e.g. io,cas")
+    parser.add_argument("--min-offset", type=int, nargs="+", default=[1])
+    parser.add_argument("--max-offset", type=int, nargs="+", default=[5])
+    parser.add_argument("--min-duration", type=int, nargs="+", default=[1])
+    parser.add_argument("--max-duration", type=int, nargs="+", default=[10])
+    parser.add_argument("--engines", nargs="+", default=["linearize_io", "linearize_wgl", "check"], choices=list(ENGINES))
+    parser.add_argument("--cases", type=int, default=200, help="histories per grid point")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench.json", help="results file")
+    parser.add_argument("--baseline", help="results file of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    grid = {
+        "n": args.n, "m": args.m, "p": args.p, "ops": [ops.split(",") for ops in args.ops],
+        "min_offset": args.min_offset, "max_offset": args.max_offset,
+        "min_duration": args.min_duration, "max_duration": args.max_duration,
+    }
+    results = run_grid(grid, args.engines, args.cases, args.seed)
+
+    with open(args.out, "w") as f:
+        json.dump({
+            "meta": {"seed": args.seed, "cases": args.cases, "python": sys.version, "platform": platform.platform()},
+            "results": results,
+        }, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+from typing import Dict, DefaultDict, Optional, List, Any, Callable
+from dataclasses import dataclass
+from collections import defaultdict, Counter
+from classes import *
+from linearize_io import linearize_io
+from linearize_wgl import linearize_wgl
+import linearize_io_helper as hp
+import time
+
+
+@dataclass
+class CheckResult:
+    """
+    linearizable is the verdict, None if the budget ran out before the engine reached one\n
+    engine is the name of the checker that decided it\n
+    order is the witness linearization, if the engine produced one\n
+    stats are the statistics of the search, partial if the budget ran out
+    """
+    linearizable: Optional[bool]
+    engine: str
+    order: Optional[List[Call]] = None
+    stats: Optional[SearchStats] = None
+
+
+# nodes explored between two polls of the clock and the cancellation token of a Budget
+POLL_INTERVAL = 256
+
+
+@dataclass
+class Budget:
+    """
+    Limits of a search, None for no limit\n
+    seconds is the wall clock time from the start of the search\n
+    max_nodes is the number of search nodes (see SearchStats.nodes)\n
+    cancel is a token that stops the search once cancel.is_set() is True, e.g. a threading.Event or multiprocessing.Event
+    """
+    seconds: Optional[float] = None
+    max_nodes: Optional[int] = None
+    cancel: Optional[Any] = None
+
+    def should_stop(self, stats: SearchStats) -> Callable[[], bool]:
+        """
+        Poll function for the should_stop of linearize_wgl and utils.linearize_generic, starting the clock now.
+        The nodes are read from stats, which must be the one given to the same search.
+        The clock and the token are only looked at every POLL_INTERVAL nodes.
+        """
+        deadline = None if self.seconds is None else time.monotonic() + self.seconds
+        max_nodes, cancel = self.max_nodes, self.cancel
+
+        def should_stop() -> bool:
+            if max_nodes is not None and stats.nodes >= max_nodes:
+                return True
+            if stats.nodes % POLL_INTERVAL:
+                return False
+            return (deadline is not None and time.monotonic() >= deadline) or (cancel is not None and cancel.is_set())
+
+        return should_stop
+
+
+# initial state of the sequential specification each call type belongs to
+STATE_OF_CALL: Dict[type, Callable[[], State]] = {
+    CallWrite: StateIO,
+    CallRead: StateIO,
+    CallCAS: StateIO,
+    CallEnq: StateQueue,
+    CallDeq: StateQueue,
+    CallPush: StateStack,
+    CallPop: StateStack,
+    CallAdd: StateSet,
+    CallRemove: StateSet,
+    CallContains: StateSet,
+    CallPut: StateMap,
+    CallGet: StateMap,
+    CallFetchAdd: StateCounter,
+}
+
+
+def initial_state(spec: List[Call]) -> State:
+    state_types = {STATE_OF_CALL[type(c)] for c in spec}
+    if len(state_types) != 1:
+        raise ValueError(f"Cannot pick a single state for the calls {[str(c) for c in spec]}")
+    return state_types.pop()()
+
+
+def isIO_applicable(spec: List[Call]) -> bool:
+    """
+    linearize_io is only sound on register histories where every value is written at most once
+    and no false cas intersects a write.\n
+    It also takes calls that touch as concurrent while the other engines order them,
+    so a history where a call starts exactly when another returns is left to linearize_wgl.
+    """
+    if not all(isinstance(c, (CallWrite, CallRead, CallCAS)) for c in spec):
+        return False
+
+    # a call of length 0 only touches itself, unless another call returns at the same time
+    ends = Counter(c.end for c in spec)
+    if any(ends[c.start] > (c.start == c.end) for c in spec):
+        return False
+
+    sort_by_var: DefaultDict[int, List[Call]] = defaultdict(list)
+    false_cases: List[CallCAS] = []
+    hp.populate_call_bins(spec, sort_by_var, [], false_cases)
+
+    no_writes = False
+    for var, var_class in sort_by_var.items():
+        count = sum(isinstance(c, CallWrite) or (isinstance(c, CallCAS) and c.cond and c.swap == var) for c in var_class)
+        if count > 1:
+            return False
+        no_writes = no_writes or count == 0
+
+    # a value that is never written is rejected by basic_io_checks before the false cases are looked at
+    if no_writes:
+        return True
+
+    writes = hp.get_writes_per_var(sort_by_var)
+    return not hp.isAny_cas_intersect_write(false_cases, writes)
+
+
+def check(spec: List[Call], stats: Optional[SearchStats] = None, budget: Optional[Budget] = None) -> CheckResult:
+    """
+    Decides linearizability with the fastest sound engine:
+    the polynomial linearize_io when its assumptions hold, the memoized generic search otherwise\n
+    stats is filled by the engine that runs, and a new one is made for the result if a budget is given.
+    The budget only limits the search: linearize_io is polynomial and always runs to the end.
+    When the search runs out of budget the verdict is None, so that the history can be retried with a larger budget.
+    """
+    if budget is not None and stats is None:
+        stats = SearchStats()
+
+    if isIO_applicable(spec):
+        res = linearize_io(spec, stats=stats)
+        return CheckResult(res.linearizable, "linearize_io", res.order, stats)
+
+    should_stop = None if budget is None else budget.should_stop(stats)
+    try:
+        order = linearize_wgl(spec, initial_state(spec), stats, should_stop)
+    except SearchCancelled:
+        return CheckResult(None, "linearize_wgl", stats=stats)
+    return CheckResult(order is not None, "linearize_wgl", order, stats)
@@ -1,8 +1,11 @@
 from dataclasses import dataclass, field
-from typing import Dict, Optional, List, Any, Tuple
+from typing import Dict, Optional, List, Any, Tuple, Iterator
 
 
 class Call:
+    # slots instead of a per instance dict, these objects are allocated by the million
+    __slots__ = ("threadno", "func", "args", "start", "end", "order")
+
     def __init__(self, threadno: int, func: str, args: List[Any], start: float, end: float):
         super().__init__()
         self.threadno: int = threadno
@@ -18,26 +21,96 @@ class Call:
         return (self.threadno, self.func, self.args, self.start, self.end, self.order) == (other.threadno, other.func, other.args, other.start, other.end, other.order)
 
     def __hash__(self):
+        # not cached, as every field can still be changed after construction
         return hash((self.threadno, self.func, tuple(self.args), self.start, self.end, self.order))
 
+    def __setstate__(self, state):
+        # pickles made before the slots have the attributes in a dict, newer ones in a (None, dict) pair
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+        # pickles made while the hash was cached still carry it
+        state.pop("_hash", None)
+        for attr, value in state.items():
+            setattr(self, attr, value)
+
     def __str__(self):
         return f'{self.func}({self.args})'
 
     def exec(self, state: 'State') -> Tuple['State', Any]:
         raise NotImplementedError
 
+    def commutes(self, other: 'Call') -> bool:
+        """
+        Whether self then other and other then self succeed on the same states and lead to the same state,
+        used by the search to skip interleavings that make no difference (see utils.iter_linearizations).
+        Must be symmetric, and False is always safe.
+        """
+        return False
+
 
 class State:
     def copy(self) -> 'State':
         raise NotImplementedError
 
+    def fingerprint(self) -> Any:
+        """Hashable value that is equal for two states iff they behave the same"""
+        raise NotImplementedError
+
+    def snapshot(self) -> Any:
+        """Value from which restore() can bring the state back, used to undo exec during a search"""
+        return self.copy()
+
+    def restore(self, snapshot: Any):
+        self.__dict__.update(snapshot.copy().__dict__)
+
+
+class SearchCancelled(Exception):
+    """raised by a search whose should_stop returned True"""
+    pass
+
+
+@dataclass
+class SearchStats:
+    """
+    Counters an engine fills in when it is given one, passing None (the default) disables them\n
+    nodes: search nodes explored\n
+    cache_hits: configurations skipped because they were already explored\n
+    max_width: largest number of candidates at a node\n
+    snapshots: snapshots of the state taken to undo a call\n
+    state_copies: full copies of the state\n
+    phases: seconds spent in every phase of linearize_io
+    """
+    nodes: int = 0
+    cache_hits: int = 0
+    max_width: int = 0
+    snapshots: int = 0
+    state_copies: int = 0
+    phases: Dict[str, float] = field(default_factory=dict)
+
 
 class History:
-    """Nice wrapper for a list of calls"""
+    """
+    Nice wrapper for a list of calls\n
+    The calls are kept as they are, so that they can hold any argument and be modified in place
+    (see corpus for the compact column storage of register histories).
+    """
+    __slots__ = ("calls",)
 
     def __init__(self, calls: List[Call]):
         self.calls: List[Call] = calls
 
+    def append(self, c: Call):
+        self.calls.append(c)
+
+    def __len__(self):
+        return len(self.calls)
+
+    def __getitem__(self, i: int) -> Call:
+        return self.calls[i]
+
+    def __iter__(self) -> Iterator[Call]:
+        return iter(self.calls)
+
     def __eq__(self, other: object):
         if not isinstance(other, History):
             raise NotImplementedError
@@ -49,9 +122,10 @@ class I:
     If normal, start = first return, end = last call\n
     If reversed, start = last call, end = first return
     """
+    __slots__ = ("start", "end", "reversed")
     start: float
     end: float
-    reversed: bool = False
+    reversed: bool
 
     def __init__(self, start: float, end: float, reversed: bool = False, silent: bool = False):
         if not silent:
@@ -85,15 +159,117 @@ class I:
         return self.start <= item <= self.end
 
 
+# polynomial hash of a queue content: sum of hash(value) * _BASE ** position, modulo the prime _MOD
+_MOD = (1 << 61) - 1
+_BASE = 1_000_003
+_BASE_INV = pow(_BASE, _MOD - 2, _MOD)
+
+
+class _QueueNode:
+    """
+    Interned cons cell of the values enqueued so far, newest first:
+    two nodes of the same intern table are the same object if and only if they hold the same values.\n
+    hash is the polynomial hash of the values from the oldest one.
+    """
+    __slots__ = ("parent", "value", "hash")
+
+    def __init__(self, parent: Optional['_QueueNode'], value: Any, depth: int):
+        self.parent = parent
+        self.value = value
+        self.hash = ((parent.hash if parent is not None else 0) + hash(value) % _MOD * pow(_BASE, depth, _MOD)) % _MOD
+
+
+class _QueueKey:
+    """
+    Fingerprint of a queue: the last length values of node.\n
+    Hashing is O(1), and equal hashes are confirmed by walking both nodes back until they meet,
+    which is immediate when the two queues were built the same way.
+    """
+    __slots__ = ("node", "length", "hash")
+
+    def __init__(self, node: Optional[_QueueNode], length: int, hash: int):
+        self.node = node
+        self.length = length
+        self.hash = hash
+
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self, other: object):
+        if not isinstance(other, _QueueKey) or self.hash != other.hash or self.length != other.length:
+            return False
+        a, b = self.node, other.node
+        for _ in range(self.length):
+            if a is b:
+                return True
+            if a.value != b.value:  # type: ignore
+                return False
+            a, b = a.parent, b.parent  # type: ignore
+        return True
+
+
 @dataclass
 class StateQueue(State):
+    """
+    The queue is stack[head:], so that enqueue appends and dequeue only moves head, both in O(1).\n
+    Nothing before len(stack) is ever modified, so a snapshot is just (head, len(stack))
+    and restore drops what was enqueued since.\n
+    nodes[i] is the interned node of stack[:i + 1], from which the fingerprint is built in O(1) (see _QueueKey).
+    The intern table belongs to one search: a copy starts its own table with only the values still in the queue,
+    so that the values dequeued before it are dropped.
+    """
     stack: List[Any] = field(default_factory=list)
+    head: int = 0
+    nodes: List[_QueueNode] = field(default_factory=list, repr=False, compare=False)
+    intern: Dict[Tuple[Optional[_QueueNode], Any], _QueueNode] = field(default_factory=dict, repr=False, compare=False)
+
+    def __post_init__(self):
+        for value in self.stack[len(self.nodes):]:
+            self._push_node(value)
+
+    def __len__(self):
+        return len(self.stack) - self.head
+
+    def _push_node(self, value: Any):
+        parent = self.nodes[-1] if self.nodes else None
+        node = self.intern.get((parent, value))
+        if node is None:
+            node = self.intern[(parent, value)] = _QueueNode(parent, value, len(self.nodes))
+        self.nodes.append(node)
+
+    def enqueue(self, value: Any):
+        self.stack.append(value)
+        self._push_node(value)
 
     def copy(self):
-        return StateQueue(stack=self.stack.copy())
+        return StateQueue(stack=self.stack[self.head:])
+
+    def __reduce__(self):
+        # the nodes are rebuilt on the other side rather than pickled as a long chain
+        return StateQueue, (list(self.stack), self.head)
+
+    def fingerprint(self):
+        if not self.nodes:
+            return _QueueKey(None, 0, 0)
+        node = self.nodes[-1]
+        if self.head == 0:
+            return _QueueKey(node, len(self.stack), node.hash)
+        # hash of stack[head:] as if it started at position 0
+        h = (node.hash - self.nodes[self.head - 1].hash) * pow(_BASE_INV, self.head, _MOD) % _MOD
+        return _QueueKey(node, len(self.stack) - self.head, h)
+
+    def snapshot(self):
+        return self.head, len(self.stack)
+
+    def restore(self, snapshot):
+        self.head, size = snapshot
+        del self.stack[size:]
+        del self.nodes[size:]
 
 
 class CallEnq(Call):
+    __slots__ = ("arg",)
+
     def __init__(self, threadno: int, arg: int, start: float, end: float):
         self.arg = arg
         super().__init__(threadno, "enq", [arg], start, end)
@@ -101,11 +277,13 @@ class CallEnq(Call):
     def exec(self, state):
         if not isinstance(state, StateQueue):
             raise Exception("State is not a StateQueue")
-        state.stack.append(self.arg)
+        state.enqueue(self.arg)
         return state, None
 
 
 class CallDeq(Call):
+    __slots__ = ("arg",)
+
     def __init__(self, threadno: int, arg: int, start: float, end: float):
         self.arg = arg
         super().__init__(threadno, "deq", [arg], start, end)
@@ -113,11 +291,12 @@ class CallDeq(Call):
     def exec(self, state):
         if not isinstance(state, StateQueue):
             raise Exception("State is not a StateQueue")
-        if len(state.stack) == 0:
+        if len(state) == 0:
             return
-        e = state.stack.pop(0)
+        e = state.stack[state.head]
         if e != self.arg:
             return
+        state.head += 1
         return state, e
 
 # These are special cases for the i/o operations on the register example
@@ -130,8 +309,19 @@ class StateIO(State):
     def copy(self):
         return StateIO(value=self.value)
 
+    def fingerprint(self):
+        return self.value
+
+    def snapshot(self):
+        return self.value
+
+    def restore(self, snapshot):
+        self.value = snapshot
+
 
 class CallWrite(Call):
+    __slots__ = ("arg",)
+
     def __init__(self, threadno: int, arg: int, start: float, end: float):
         self.arg = arg
         super().__init__(threadno, "write", [arg], start, end)
@@ -144,10 +334,15 @@ class CallWrite(Call):
 
 
 class CallRead(Call):
+    __slots__ = ("arg",)
+
     def __init__(self, threadno: int, arg: int, start: float, end: float):
         self.arg = arg
         super().__init__(threadno, "read", [arg], start, end)
 
+    def commutes(self, other):
+        return _is_register_read(other)
+
     def exec(self, state):
         if not isinstance(state, StateIO):
             raise Exception("State is not of type StateIO")
@@ -159,12 +354,17 @@ class CallRead(Call):
 
 
 class CallCAS(Call):
+    __slots__ = ("cond", "compare", "swap")
+
     def __init__(self, threadno: int, cond: bool, compare: int, swap: int, start: float, end: float):
         self.cond = cond
         self.compare = compare
         self.swap = swap
         super().__init__(threadno, f"cas", [compare, swap, cond], start, end)
 
+    def commutes(self, other):
+        return not self.cond and _is_register_read(other)
+
     def __str__(self):
         if self.cond:
             return f"{self.compare} -> {self.swap}"
@@ -187,3 +387,295 @@ class CallCAS(Call):
             if state.value == self.compare:
                 return
             return state, None
+
+
+def _is_register_read(c: Call) -> bool:
+    """reads and false cas never change the register"""
+    return isinstance(c, CallRead) or (isinstance(c, CallCAS) and not c.cond)
+
+
+# Stack, set, map and counter models. Their states log how to undo every change, so that a snapshot is
+# the length of the log and restore only undoes what changed since
+
+
+@dataclass
+class TrailState(State):
+    trail: List[Any] = field(default_factory=list, repr=False, compare=False)
+
+    def snapshot(self):
+        return len(self.trail)
+
+    def restore(self, snapshot):
+        while len(self.trail) > snapshot:
+            self.undo(self.trail.pop())
+
+    def undo(self, entry: Any):
+        raise NotImplementedError
+
+
+@dataclass
+class StateStack(TrailState):
+    items: List[Any] = field(default_factory=list)
+
+    def copy(self):
+        return StateStack(items=self.items.copy())
+
+    def fingerprint(self):
+        return tuple(self.items)
+
+    def undo(self, entry):
+        # the popped value, or None for a push
+        if entry is None:
+            self.items.pop()
+        else:
+            self.items.append(entry[0])
+
+
+class CallPush(Call):
+    __slots__ = ("arg",)
+
+    def __init__(self, threadno: int, arg: int, start: float, end: float):
+        self.arg = arg
+        super().__init__(threadno, "push", [arg], start, end)
+
+    def exec(self, state):
+        if not isinstance(state, StateStack):
+            raise Exception("State is not a StateStack")
+        state.items.append(self.arg)
+        state.trail.append(None)
+        return state, None
+
+
+class CallPop(Call):
+    __slots__ = ("arg",)
+
+    def __init__(self, threadno: int, arg: int, start: float, end: float):
+        self.arg = arg
+        super().__init__(threadno, "pop", [arg], start, end)
+
+    def exec(self, state):
+        if not isinstance(state, StateStack):
+            raise Exception("State is not a StateStack")
+        if len(state.items) == 0 or state.items[-1] != self.arg:
+            return
+        state.trail.append((state.items.pop(),))
+        return state, self.arg
+
+
+@dataclass
+class StateSet(TrailState):
+    items: set = field(default_factory=set)
+
+    def copy(self):
+        return StateSet(items=self.items.copy())
+
+    def fingerprint(self):
+        return frozenset(self.items)
+
+    def undo(self, entry):
+        # (element, whether it was added)
+        x, added = entry
+        if added:
+            self.items.discard(x)
+        else:
+            self.items.add(x)
+
+
+class CallSetOp(Call):
+    """
+    Base of the set calls, cond is the returned boolean: whether x was added, removed or found
+    """
+    __slots__ = ("arg", "cond")
+
+    def __init__(self, threadno: int, func: str, arg: int, cond: bool, start: float, end: float):
+        self.arg = arg
+        self.cond = cond
+        super().__init__(threadno, func, [arg, cond], start, end)
+
+    def changes(self) -> bool:
+        return self.cond and not isinstance(self, CallContains)
+
+    def commutes(self, other):
+        if not isinstance(other, CallSetOp):
+            return False
+        return self.arg != other.arg or not (self.changes() or other.changes())
+
+    def exec(self, state):
+        if not isinstance(state, StateSet):
+            raise Exception("State is not a StateSet")
+        # add returns True iff x is absent, remove and contains iff x is present
+        if (self.arg in state.items) == (self.cond == isinstance(self, CallAdd)):
+            return
+        if self.changes():
+            added = isinstance(self, CallAdd)
+            if added:
+                state.items.add(self.arg)
+            else:
+                state.items.remove(self.arg)
+            state.trail.append((self.arg, added))
+        return state, self.cond
+
+
+class CallAdd(CallSetOp):
+    __slots__ = ()
+
+    def __init__(self, threadno: int, arg: int, cond: bool, start: float, end: float):
+        super().__init__(threadno, "add", arg, cond, start, end)
+
+
+class CallRemove(CallSetOp):
+    __slots__ = ()
+
+    def __init__(self, threadno: int, arg: int, cond: bool, start: float, end: float):
+        super().__init__(threadno, "remove", arg, cond, start, end)
+
+
+class CallContains(CallSetOp):
+    __slots__ = ()
+
+    def __init__(self, threadno: int, arg: int, cond: bool, start: float, end: float):
+        super().__init__(threadno, "contains", arg, cond, start, end)
+
+
+@dataclass
+class StateMap(TrailState):
+    items: Dict[Any, Any] = field(default_factory=dict)
+
+    def copy(self):
+        return StateMap(items=self.items.copy())
+
+    def fingerprint(self):
+        return frozenset(self.items.items())
+
+    def undo(self, entry):
+        # (key, previous value), the previous value is None if the key was absent
+        key, value = entry
+        if value is None:
+            del self.items[key]
+        else:
+            self.items[key] = value
+
+
+class CallPut(Call):
+    """
+    Sets key to value, the value cannot be None
+    """
+    __slots__ = ("key", "value")
+
+    def __init__(self, threadno: int, key: int, value: int, start: float, end: float):
+        self.key = key
+        self.value = value
+        super().__init__(threadno, "put", [key, value], start, end)
+
+    def commutes(self, other):
+        return isinstance(other, (CallPut, CallGet)) and self.key != other.key
+
+    def exec(self, state):
+        if not isinstance(state, StateMap):
+            raise Exception("State is not a StateMap")
+        state.trail.append((self.key, state.items.get(self.key)))
+        state.items[self.key] = self.value
+        return state, None
+
+
+class CallGet(Call):
+    """
+    Reads key, value is None if the key is absent
+    """
+    __slots__ = ("key", "value")
+
+    def __init__(self, threadno: int, key: int, value: Optional[int], start: float, end: float):
+        self.key = key
+        self.value = value
+        super().__init__(threadno, "get", [key, value], start, end)
+
+    def commutes(self, other):
+        return isinstance(other, CallGet) or (isinstance(other, CallPut) and self.key != other.key)
+
+    def exec(self, state):
+        if not isinstance(state, StateMap):
+            raise Exception("State is not a StateMap")
+        if state.items.get(self.key) != self.value:
+            return
+        return state, self.value
+
+
+@dataclass
+class StateCounter(State):
+    value: int = 0
+
+    def copy(self):
+        return StateCounter(value=self.value)
+
+    def fingerprint(self):
+        return self.value
+
+    def snapshot(self):
+        return self.value
+
+    def restore(self, snapshot):
+        self.value = snapshot
+
+
+class CallFetchAdd(Call):
+    """
+    Adds arg to the counter and returns the previous value ret, a read is a fetch-and-add of 0
+    """
+    __slots__ = ("arg", "ret")
+
+    def __init__(self, threadno: int, arg: int, ret: int, start: float, end: float):
+        self.arg = arg
+        self.ret = ret
+        super().__init__(threadno, "fetch_add", [arg, ret], start, end)
+
+    def commutes(self, other):
+        return isinstance(other, CallFetchAdd) and self.arg == 0 and other.arg == 0
+
+    def exec(self, state):
+        if not isinstance(state, StateCounter):
+            raise Exception("State is not a StateCounter")
+        if state.value != self.ret:
+            return
+        state.value += self.arg
+        return state, self.ret
+
+
+# kind codes of the columnar corpus format (corpus.Corpus)
+CALL_KINDS: List[type] = [
+    CallWrite, CallRead, CallCAS, CallEnq, CallDeq,
+    CallPush, CallPop, CallAdd, CallRemove, CallContains, CallPut, CallGet, CallFetchAdd]
+_KIND_OF_CALL: Dict[type, int] = {kind: i for i, kind in enumerate(CALL_KINDS)}
+
+
+def encode_call(c: Call) -> Tuple[int, int, Any, Any, bool, float, float]:
+    """
+    (kind, threadno, arg0, arg1, cond, start, end)\n
+    arg0 and arg1 are compare and swap for a cas, key and value for a map call (cond tells whether a get found the key),
+    arg and ret for a fetch-and-add, arg and 0 for every other call
+    """
+    kind = _KIND_OF_CALL[type(c)]
+    if isinstance(c, CallCAS):
+        return kind, c.threadno, c.compare, c.swap, c.cond, c.start, c.end
+    if isinstance(c, CallSetOp):
+        return kind, c.threadno, c.arg, 0, c.cond, c.start, c.end
+    if isinstance(c, (CallPut, CallGet)):
+        found = c.value is not None
+        return kind, c.threadno, c.key, c.value if found else 0, found, c.start, c.end
+    if isinstance(c, CallFetchAdd):
+        return kind, c.threadno, c.arg, c.ret, False, c.start, c.end
+    return kind, c.threadno, c.args[0], 0, False, c.start, c.end
+
+
+def decode_call(kind: int, threadno: int, arg0: Any, arg1: Any, cond: bool, start: float, end: float) -> Call:
+    call_type = CALL_KINDS[kind]
+    if call_type is CallCAS:
+        return CallCAS(threadno=threadno, cond=cond, compare=arg0, swap=arg1, start=start, end=end)
+    if issubclass(call_type, CallSetOp):
+        return call_type(threadno, arg0, cond, start, end)
+    if call_type is CallPut:
+        return CallPut(threadno, arg0, arg1, start, end)
+    if call_type is CallGet:
+        return CallGet(threadno, arg0, arg1 if cond else None, start, end)
+    if call_type is CallFetchAdd:
+        return CallFetchAdd(threadno, arg0, arg1, start, end)
+    return call_type(threadno, arg0, start, end)
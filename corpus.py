@@ -0,0 +1,160 @@
+from typing import Dict, Optional, List, Any, Tuple, Iterable, Iterator
+from array import array
+from classes import *
+from utils import iter_test
+import numpy as np
+import json
+import os
+import pickle
+import shutil
+import sys
+
+# column name -> (numpy dtype, array typecode) of one row per call
+CALL_COLUMNS: Dict[str, Tuple[str, str]] = {
+    "kind": ("<i1", "b"),
+    "threadno": ("<i4", "i"),
+    "arg0": ("<i8", "q"),
+    "arg1": ("<i8", "q"),
+    "cond": ("<i1", "b"),
+    "start": ("<f8", "d"),
+    "end": ("<f8", "d"),
+}
+# column name -> (numpy dtype, array typecode) of one row per history
+HISTORY_COLUMNS: Dict[str, Tuple[str, str]] = {
+    "offsets": ("<i8", "q"),
+    "expected": ("<i1", "b"),
+}
+# rows kept in memory before they are appended to the column files
+FLUSH_ROWS = 1 << 16
+
+
+def _check_dirname(dirname: str):
+    if not dirname.endswith(".corpus"):
+        raise ValueError(f"{dirname} is not a corpus directory")
+
+
+def _encode_row(c: Call) -> Tuple[int, int, int, int, bool, float, float]:
+    row = encode_call(c)
+    for arg in row[2:4]:
+        if not isinstance(arg, int) or not -(1 << 63) <= arg < 1 << 63:
+            raise ValueError(f"Cannot store {c}: the corpus format only holds 64 bit integer arguments")
+    return row
+
+
+def save_corpus(tests: Iterable[Tuple[List[Call], bool]], dirname: str):
+    """
+    Writes the tests to tests/{dirname} as one raw little-endian file per column.\n
+    The calls of history i are the rows offsets[i]:offsets[i + 1] of the call columns.
+    The tests are consumed as a stream and written in batches, so they never have to be in memory all at once.
+    They are written to a temporary directory that only replaces tests/{dirname} once everything is written,
+    so a test that cannot be stored (e.g. a str argument) leaves no partial corpus behind.
+    """
+    _check_dirname(dirname)
+    path = f"tests/{dirname}"
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    columns = {**CALL_COLUMNS, **HISTORY_COLUMNS}
+    buffers = {name: array(typecode) for name, (_, typecode) in columns.items()}
+
+    try:
+        files = {name: open(f"{tmp_path}/{name}.bin", "wb") for name in columns}
+
+        def flush():
+            for name, buffer in buffers.items():
+                if sys.byteorder != "little":
+                    buffer.byteswap()
+                buffer.tofile(files[name])
+                del buffer[:]
+
+        try:
+            calls = 0
+            buffers["offsets"].append(0)
+            for spec, res in tests:
+                for c in spec:
+                    kind, threadno, arg0, arg1, cond, start, end = _encode_row(c)
+                    buffers["kind"].append(kind)
+                    buffers["threadno"].append(threadno)
+                    buffers["arg0"].append(arg0)
+                    buffers["arg1"].append(arg1)
+                    buffers["cond"].append(cond)
+                    buffers["start"].append(start)
+                    buffers["end"].append(end)
+                calls += len(spec)
+                buffers["offsets"].append(calls)
+                buffers["expected"].append(res)
+                if len(buffers["start"]) >= FLUSH_ROWS:
+                    flush()
+            flush()
+        finally:
+            for f in files.values():
+                f.close()
+
+        with open(f"{tmp_path}/meta.json", "w") as f:
+            json.dump({name: dtype for name, (dtype, _) in columns.items()}, f)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.rename(tmp_path, path)
+
+
+class Corpus:
+    """
+    Read-only view of a corpus written by save_corpus.\n
+    The columns are memory-mapped, and a history only becomes Call objects when it is accessed.
+    """
+
+    def __init__(self, dirname: str):
+        _check_dirname(dirname)
+        path = f"tests/{dirname}"
+        if not os.path.exists(f"{path}/meta.json"):
+            raise FileNotFoundError(f"{path} not found")
+
+        with open(f"{path}/meta.json") as f:
+            dtypes: Dict[str, str] = json.load(f)
+        self.columns: Dict[str, np.ndarray] = {}
+        for name, dtype in dtypes.items():
+            if os.path.getsize(f"{path}/{name}.bin") == 0:
+                # np.memmap refuses empty files
+                self.columns[name] = np.zeros(0, dtype=dtype)
+            else:
+                self.columns[name] = np.memmap(f"{path}/{name}.bin", dtype=dtype, mode="r")
+
+    def __len__(self):
+        return len(self.columns["expected"])
+
+    def get_spec(self, i: int) -> List[Call]:
+        first, last = self.columns["offsets"][i:i + 2].tolist()
+        rows = zip(*(self.columns[name][first:last].tolist() for name in CALL_COLUMNS))
+        return [decode_call(kind, threadno, arg0, arg1, bool(cond), start, end)
+                for kind, threadno, arg0, arg1, cond, start, end in rows]
+
+    def __getitem__(self, i: int) -> Tuple[List[Call], bool]:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"test {i} out of range")
+        return self.get_spec(i), bool(self.columns["expected"][i])
+
+    def __iter__(self) -> Iterator[Tuple[List[Call], bool]]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+def pickle_to_corpus(filename: str, dirname: str):
+    """
+    Converts a pickle file written by utils.save_test or utils.generate_tests
+    """
+    save_corpus(iter_test(filename), dirname)
+
+
+def corpus_to_pickle(dirname: str, filename: str):
+    if not filename.endswith(".pkl"):
+        raise ValueError(f"File {filename} is not a pickle file")
+
+    with open(f"tests/{filename}", "wb") as f:
+        for t in Corpus(dirname):
+            pickle.dump(t, f)
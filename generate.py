@@ -0,0 +1,161 @@
+from typing import Dict, Optional, List, Any, Tuple, Iterator, Deque
+from collections import deque
+from classes import *
+from linearize_wgl import WGLSearch
+from utils import isAny_fcas_intersect_write_comb
+from corpus import save_corpus
+import numpy as np
+import multiprocessing
+import pickle
+import tqdm
+
+_WRITE = CALL_KINDS.index(CallWrite)
+_READ = CALL_KINDS.index(CallRead)
+_CAS = CALL_KINDS.index(CallCAS)
+
+
+def random_specs(
+        rng: np.random.Generator, batch: int, n: int, m: int, p: int, ops: List[str],
+        min_offset: int, max_offset: int, min_duration: int, max_duration: int) -> List[List[Call]]:
+    """
+    batch histories drawn like utils.generate_random_spec, with every random column drawn at once as NumPy arrays.\n
+    The start of a call is the end of the previous call of its thread plus an offset, which is a running sum per thread.
+    Whether a call reads or writes depends on the values marked by the calls before it, so that part is a loop over
+    the m columns, but it works on all the histories of the batch at once.
+    """
+    if not set(ops) <= {"io", "cas"}:
+        raise NotImplementedError(f"Operations {set(ops) - {'io', 'cas'}} not implemented")
+    if "cas" in ops and p < 1:
+        raise ValueError("A cas needs at least 2 variables")
+
+    is_cas = (np.array(ops) == "cas")[rng.integers(0, len(ops), (batch, m))]
+    thread = rng.integers(1, n + 1, (batch, m))
+    offset = rng.integers(min_offset, max_offset + 1, (batch, m)) + rng.random((batch, m))
+    duration = rng.integers(min_duration, max_duration + 1, (batch, m)) + rng.random((batch, m))
+    arg = rng.integers(0, p + 1, (batch, m))
+    # a second variable different from arg, uniformly
+    arg2 = (arg + rng.integers(1, max(p, 1) + 1, (batch, m))) % (p + 1)
+
+    end = np.zeros((batch, m))
+    for t in range(1, n + 1):
+        in_thread = thread == t
+        end += np.where(in_thread, np.cumsum(np.where(in_thread, offset + duration, 0), axis=1), 0)
+    start = end - duration
+
+    # a read or a false cas if arg is already marked, otherwise a write or a true cas that marks arg and its compare
+    kind = np.empty((batch, m), dtype=np.int8)
+    cond = np.zeros((batch, m), dtype=bool)
+    arg0 = arg.copy()
+    arg1 = np.zeros((batch, m), dtype=np.int64)
+    marks = np.zeros((batch, p + 1), dtype=bool)
+    rows = np.arange(batch)
+    for j in range(m):
+        marked = marks[rows, arg[:, j]]
+        cas = is_cas[:, j]
+        true_cas = cas & ~marked
+        kind[:, j] = np.where(cas, _CAS, np.where(marked, _READ, _WRITE))
+        cond[:, j] = true_cas
+        arg0[:, j] = np.where(true_cas, arg2[:, j], arg[:, j])
+        arg1[:, j] = np.where(true_cas, arg[:, j], np.where(cas, arg2[:, j], 0))
+        marks[rows, arg[:, j]] = True
+        marks[rows[true_cas], arg2[true_cas, j]] = True
+
+    specs: List[List[Call]] = []
+    columns = zip(kind.tolist(), thread.tolist(), arg0.tolist(), arg1.tolist(), cond.tolist(),
+                  start.tolist(), end.tolist())
+    for row in columns:
+        # grouped by thread in the order the threads first appear, as in generate_random_spec
+        threads: Dict[int, List[Call]] = {}
+        for k, t, a0, a1, c, s, e in zip(*row):
+            threads.setdefault(t, []).append(decode_call(k, t, a0, a1, c, s, e))
+        specs.append([c for calls in threads.values() for c in calls])
+    return specs
+
+
+def is_linearizable(spec: List[Call]) -> bool:
+    """
+    verdict of the memoized search, without setting the order of the calls
+    """
+    search = WGLSearch(spec)
+    return search.search([0] * len(search.thread_lists), StateIO()) is not None
+
+
+def _labelled_batch(task: Tuple[np.random.SeedSequence, int, Dict[str, Any]]) -> List[Tuple[List[Call], bool]]:
+    seed, batch, params = task
+    min_cas = params.pop("min_cas")
+    min_read = params.pop("min_read")
+    specs = random_specs(np.random.default_rng(seed), batch, **params)
+
+    labelled = []
+    for spec in specs:
+        if min_cas > 0 and "cas" in params["ops"] and sum(isinstance(c, CallCAS) for c in spec) < min_cas:
+            continue
+        if min_read > 0 and sum(isinstance(c, CallRead) for c in spec) < min_read:
+            continue
+        if isAny_fcas_intersect_write_comb(spec):
+            continue
+        labelled.append((spec, is_linearizable(spec)))
+    return labelled
+
+
+def iter_generated(
+        total=1000, success_percentage=0.2, no_threads=3, no_operations=8,
+        no_variables=4, ops=["io", "cas"], min_cas=0, min_read=-0,
+        min_offset=1, max_offset=5, min_duration=1, max_duration=10,
+        processes: Optional[int] = None, batch_size: int = 1024, seed: Optional[int] = None
+) -> Iterator[Tuple[List[Call], bool]]:
+    """
+    Streams the tests of utils.generate_tests (same parameters and quotas).\n
+    Batches of batch_size histories are generated and labelled by a pool of processes (all cores by default),
+    while the quotas of linearizable and non linearizable histories are filled here, in batch order.
+    With a seed the output does not depend on the number of processes.
+    """
+    params = dict(
+        n=no_threads, m=no_operations, p=no_variables, ops=ops, min_cas=min_cas, min_read=min_read,
+        min_offset=min_offset, max_offset=max_offset, min_duration=min_duration, max_duration=max_duration)
+    seeds = np.random.SeedSequence(seed)
+
+    def next_task():
+        return seeds.spawn(1)[0], batch_size, dict(params)
+
+    success = 0
+    fail = 0
+
+    def accepted(batch: List[Tuple[List[Call], bool]]) -> Iterator[Tuple[List[Call], bool]]:
+        nonlocal success, fail
+        for spec, sol in batch:
+            if not sol and fail < total * (1 - success_percentage):
+                fail += 1
+                yield spec, False
+            elif sol and success < total * success_percentage:
+                success += 1
+                yield spec, True
+
+    if processes == 1:
+        while success + fail < total:
+            yield from accepted(_labelled_batch(next_task()))
+        return
+
+    with multiprocessing.Pool(processes) as pool:
+        # a bounded number of batches in flight, consumed in submission order
+        window = 2 * (processes or multiprocessing.cpu_count())
+        pending: Deque[Any] = deque(pool.apply_async(_labelled_batch, (next_task(),)) for _ in range(window))
+        while success + fail < total:
+            batch = pending.popleft().get()
+            pending.append(pool.apply_async(_labelled_batch, (next_task(),)))
+            yield from accepted(batch)
+
+
+def generate_tests_batched(filename: str, total=1000, **kwargs):
+    """
+    utils.generate_tests with iter_generated, written to tests/{filename} as a pickle file,
+    or as a columnar corpus if filename ends with .corpus
+    """
+    tests = tqdm.tqdm(iter_generated(total, **kwargs), total=total)
+    if filename.endswith(".corpus"):
+        save_corpus(tests, filename)
+        return
+
+    with open(f"tests/{filename}", "wb") as f:
+        for t in tests:
+            pickle.dump(t, f)
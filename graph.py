@@ -2,26 +2,27 @@ from typing import Dict, List, Set, Tuple
 
 
 def find_cycles(graph: Dict[int, List[int]]):
-    """Return all unique cycles bigger than 2. Each cycle should be sorted."""
+    """
+    Return all unique cycles bigger than 2 closed by a depth first search from every node. Each cycle should be sorted.\n
+    The search keeps an explicit stack, so long paths do not hit the recursion limit.
+    """
     cycles: Set[Tuple[int, ...]] = set()
-
-    def dfs(node: int, visited: Set[int], path: List[int]):
-        visited.add(node)
-        path.append(node)
-
-        for neighbor in graph[node]:
-            if neighbor not in visited:
-                dfs(neighbor, visited, path)
-            elif neighbor == path[0] and len(path) > 2:
-                cycle = tuple(sorted(path))
-                cycles.add(cycle)
-
-        path.pop()
-
-    for node in graph:
-        visited = set()
-        path = []
-        dfs(node, visited, path)
+    for root in graph:
+        visited = {root}
+        path = [root]
+        stack = [iter(graph[root])]
+        while stack:
+            for neighbor in stack[-1]:
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    path.append(neighbor)
+                    stack.append(iter(graph[neighbor]))
+                    break
+                if neighbor == path[0] and len(path) > 2:
+                    cycles.add(tuple(sorted(path)))
+            else:
+                stack.pop()
+                path.pop()
 
     return [sorted(cycle) for cycle in cycles if len(cycle) > 2]
 
@@ -32,10 +33,10 @@ def get_non_cycle_edges(graph: Dict[int, List[int]], cycles: List[List[int]]):
     for cycle in cycles:
         for i in range(len(cycle)):
             j = (i + 1) % len(cycle)
-            cycle_edges.add(tuple(sorted((cycle[i], cycle[j]))))
+            cycle_edges.add(tuple(sorted((cycle[i], cycle[j]))))  # type: ignore
     non_cycle_edges: Set[Tuple[int, int]] = set()
     for node, neighbors in graph.items():
         for neighbor in neighbors:
             if node != neighbor and tuple(sorted((node, neighbor))) not in cycle_edges:
-                non_cycle_edges.add(tuple(sorted((node, neighbor))))
+                non_cycle_edges.add(tuple(sorted((node, neighbor))))  # type: ignore
     return sorted([list(edge) for edge in non_cycle_edges])
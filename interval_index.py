@@ -0,0 +1,186 @@
+from typing import List, Tuple
+from classes import I
+import bisect
+import math
+
+
+class RangeIndex:
+    """
+    Static segment tree over a list of values, for the queries of the interval checks:\n
+    report_below: all positions in a range whose value is below a bound, in O((k + 1) log n) for k results\n
+    last_below: last position up to some index whose value is below a bound, in O(log n)\n
+    first_above: first position from some index on whose value is above a bound, in O(log n)
+    """
+
+    def __init__(self, values: List[float]):
+        self.n = len(values)
+        self.size = 1
+        while self.size < self.n:
+            self.size *= 2
+        # node 1 is the root, the children of node k are 2k and 2k + 1, leaves start at size
+        self.mins: List[float] = [math.inf] * (2 * self.size)
+        self.maxs: List[float] = [-math.inf] * (2 * self.size)
+        for i, value in enumerate(values):
+            self.mins[self.size + i] = value
+            self.maxs[self.size + i] = value
+        for k in range(self.size - 1, 0, -1):
+            self.mins[k] = min(self.mins[2 * k], self.mins[2 * k + 1])
+            self.maxs[k] = max(self.maxs[2 * k], self.maxs[2 * k + 1])
+
+    def report_below(self, lo: int, hi: int, bound: float, strict: bool = True) -> List[int]:
+        """
+        positions lo <= p < hi with values[p] < bound (<= if not strict), in increasing order
+        """
+        res: List[int] = []
+        if lo >= hi:
+            return res
+        # (node, first leaf, last leaf + 1), the right child is pushed first so that the left one is popped first
+        stack = [(1, 0, self.size)]
+        while stack:
+            k, node_lo, node_hi = stack.pop()
+            if node_hi <= lo or node_lo >= hi:
+                continue
+            if self.mins[k] > bound or (strict and self.mins[k] == bound):
+                continue
+            if k >= self.size:
+                res.append(k - self.size)
+                continue
+            mid = (node_lo + node_hi) // 2
+            stack.append((2 * k + 1, mid, node_hi))
+            stack.append((2 * k, node_lo, mid))
+        return res
+
+    def last_below(self, hi: int, bound: float) -> int:
+        """
+        last position p < hi with values[p] < bound, or -1 if there is none
+        """
+        # the left child is pushed first so that the right one is popped first
+        stack = [(1, 0, self.size)]
+        while stack:
+            k, node_lo, node_hi = stack.pop()
+            if node_lo >= hi or self.mins[k] >= bound:
+                continue
+            if k >= self.size:
+                return k - self.size
+            mid = (node_lo + node_hi) // 2
+            stack.append((2 * k, node_lo, mid))
+            stack.append((2 * k + 1, mid, node_hi))
+        return -1
+
+    def first_above(self, lo: int, bound: float) -> int:
+        """
+        first position p >= lo with values[p] > bound, or n if there is none
+        """
+        stack = [(1, 0, self.size)]
+        while stack:
+            k, node_lo, node_hi = stack.pop()
+            if node_hi <= lo or self.maxs[k] <= bound:
+                continue
+            if k >= self.size:
+                return k - self.size
+            mid = (node_lo + node_hi) // 2
+            stack.append((2 * k + 1, mid, node_hi))
+            stack.append((2 * k, node_lo, mid))
+        return self.n
+
+
+class MaxIndex:
+    """
+    Segment tree over positions that start at -inf and can be updated, for sweeps where items come and go:\n
+    update: set the value of a position, in O(log n)\n
+    first_at_least: first position whose value is at least a bound, in O(log n)
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.size = 1
+        while self.size < n:
+            self.size *= 2
+        self.maxs: List[float] = [-math.inf] * (2 * self.size)
+
+    def update(self, pos: int, value: float):
+        k = self.size + pos
+        self.maxs[k] = value
+        k //= 2
+        while k:
+            self.maxs[k] = max(self.maxs[2 * k], self.maxs[2 * k + 1])
+            k //= 2
+
+    def first_at_least(self, bound: float) -> int:
+        """
+        first position p with values[p] >= bound, or n if there is none
+        """
+        if self.maxs[1] < bound:
+            return self.n
+        k = 1
+        while k < self.size:
+            k = 2 * k if self.maxs[2 * k] >= bound else 2 * k + 1
+        return k - self.size
+
+
+# Sweep line checks over the sorted endpoints, O(n log n) instead of comparing every pair
+
+
+def any_overlap(intervals: List[I]) -> bool:
+    """
+    whether two of the intervals intersect, touching endpoints included
+    """
+    latest_end = -math.inf
+    for interval in sorted(intervals, key=lambda x: x.start):
+        if interval.start <= latest_end:
+            return True
+        latest_end = max(latest_end, interval.end)
+    return False
+
+
+def any_open_overlap(intervals: List[I]) -> bool:
+    """
+    whether two of the intervals share more than an endpoint
+    """
+    latest_end = -math.inf
+    # an interval of length 0 shares at most a point with the others
+    for interval in sorted((x for x in intervals if x.start < x.end), key=lambda x: x.start):
+        if interval.start < latest_end:
+            return True
+        latest_end = max(latest_end, interval.end)
+    return False
+
+
+def any_cross_overlap(intervals_a: List[I], intervals_b: List[I]) -> bool:
+    """
+    whether an interval of intervals_a intersects an interval of intervals_b, touching endpoints included
+    """
+    # (point, 0 for a start and 1 for an end, side), starts come first so that touching intervals are both open
+    events: List[Tuple[float, int, int]] = []
+    for side, intervals in enumerate((intervals_a, intervals_b)):
+        for interval in intervals:
+            events.append((interval.start, 0, side))
+            events.append((interval.end, 1, side))
+    events.sort()
+
+    open_count = [0, 0]
+    for _, is_end, side in events:
+        if is_end:
+            open_count[side] -= 1
+        elif open_count[1 - side] > 0:
+            return True
+        else:
+            open_count[side] += 1
+    return False
+
+
+def any_strictly_inside(inner: List[I], outer: List[I]) -> bool:
+    """
+    whether an interval of inner lies strictly inside an interval of outer, without touching its endpoints
+    """
+    outer = sorted(outer, key=lambda x: x.start)
+    starts = [interval.start for interval in outer]
+    # prefix_max_end[k] = latest end among outer[:k]
+    prefix_max_end = [-math.inf]
+    for interval in outer:
+        prefix_max_end.append(max(prefix_max_end[-1], interval.end))
+
+    for interval in inner:
+        if prefix_max_end[bisect.bisect_left(starts, interval.start)] > interval.end:
+            return True
+    return False
@@ -0,0 +1,143 @@
+from typing import Dict, DefaultDict, Optional, List, Any, Tuple, Callable
+from dataclasses import dataclass
+from collections import defaultdict
+from classes import *
+import linearize_io_helper as hp
+import copy
+import math
+import time
+import tqdm
+
+
+@dataclass
+class IOResult:
+    """
+    linearizable is the verdict\n
+    failed_check is the name of the check that rejected the history\n
+    order is the witness linearization, if the history is linearizable and one could be built
+    """
+    linearizable: bool
+    failed_check: Optional[str] = None
+    order: Optional[List[Call]] = None
+
+
+def is_valid_order(order: List[Call], state: State) -> bool:
+    """
+    checks in linear time that the sequence respects the real time order and the sequential specification\n
+    As in linearize_wgl, a call that starts exactly when another returns comes after it.
+    """
+    latest_start = -math.inf
+    for c in order:
+        if c.end <= latest_start:
+            return False
+        latest_start = max(latest_start, c.start)
+
+    state = state.copy()
+    for c in order:
+        optional_state = c.exec(state)
+        if optional_state is None:
+            return False
+        state, _ = optional_state
+    return True
+
+
+def _fail(check: str, verbose: bool) -> IOResult:
+    if verbose:
+        print(f"{check} failed")
+    return IOResult(False, failed_check=check)
+
+
+def _timed(stats: Optional[SearchStats], phase: str, f: Callable, *args):
+    """
+    f(*args), whose duration is added to stats.phases[phase] if stats is not None
+    """
+    if stats is None:
+        return f(*args)
+    t = time.perf_counter()
+    try:
+        return f(*args)
+    finally:
+        stats.phases[phase] = stats.phases.get(phase, 0.0) + time.perf_counter() - t
+
+
+def linearize_io(spec: List[Call], verbose=False, stats: Optional[SearchStats] = None) -> IOResult:
+    """
+    Polynomial time check for register histories made of CallWrite, CallRead and CallCAS.\n
+    Assumes that every value is written at most once and that no false CAS intersects a write.
+    Calls that touch (one starts exactly when the other returns) are taken as concurrent, unlike linearize_wgl,
+    checker.check sends such histories to linearize_wgl.\n
+    stats.phases gets the time spent in every phase, by the name of its function in linearize_io_helper.
+    """
+    sort_by_var: DefaultDict[int, List[Call]] = defaultdict(list)
+    false_cases: List[CallCAS] = []
+    true_cases: List[CallCAS] = []
+
+    _timed(stats, "populate_call_bins", hp.populate_call_bins, spec, sort_by_var, true_cases, false_cases)
+
+    writes = _timed(stats, "basic_io_checks", hp.basic_io_checks, sort_by_var)
+    if writes is None:
+        return _fail("basic_io_checks", verbose)
+
+    if _timed(stats, "isAny_cas_intersect_write", hp.isAny_cas_intersect_write, false_cases, writes):
+        raise Exception("Assumption Violation: CAS intersects Write")
+
+    true_cas_var_groups = _timed(stats, "analyze_true_cas", hp.analyze_true_cas, true_cases)
+    if true_cas_var_groups is None:
+        return _fail("basic_true_cas_checks", verbose)
+
+    if not _timed(stats, "intra_group_check", hp.intra_group_check, sort_by_var, true_cas_var_groups):
+        return _fail("intra_group_check", verbose)
+
+    if not _timed(stats, "inter_group_check", hp.inter_group_check, sort_by_var, true_cas_var_groups):
+        return _fail("inter_group_check", verbose)
+
+    intervals: Dict[int, I] = _timed(stats, "make_intervals", hp.make_intervals, sort_by_var)
+
+    if not _timed(stats, "io_check", hp.io_check, intervals):
+        return _fail("io_check", verbose)
+
+    blocks = _timed(stats, "make_blocks", hp.make_blocks, sort_by_var, intervals, true_cas_var_groups)
+
+    false_cas_var_resolver = _timed(
+        stats, "get_false_cas_resolvers", hp.get_false_cas_resolvers, sort_by_var, false_cases, blocks, writes, intervals)
+
+    if not _timed(stats, "false_cas_group_check", hp.false_cas_group_check, false_cas_var_resolver, writes):
+        return _fail("false_cas_group_check", verbose)
+
+    if verbose:
+        print(blocks)
+        print({f"{k} ({round(k.start, 2)} - {round(k.end,2)})": v for k, v in false_cas_var_resolver.items()})
+
+    for false_cas in false_cases:
+        if len(false_cas_var_resolver[false_cas]) == 0:
+            return _fail("false_cas_var_resolver", verbose)
+
+    # it is linearizable
+    for false_cas in false_cases:
+        v = false_cas_var_resolver[false_cas].pop()
+        sort_by_var[v].append(false_cas)
+
+    _timed(stats, "set_order", hp.set_order, sort_by_var, true_cas_var_groups, verbose)
+
+    order = sorted(spec, key=lambda c: c.order)
+    # set_order does not always place the false cas correctly, only a checked order is reported as witness
+    if not _timed(stats, "is_valid_order", is_valid_order, order, StateIO()):
+        return IOResult(True)
+    return IOResult(True, order=order)
+
+
+def run_test(testsample: List[Tuple[List[Call], bool]]):
+    wrong_test_no = []
+    for i in tqdm.tqdm(range(len(testsample))):
+        testcase, res = copy.deepcopy(testsample[i])
+        sol = linearize_io(testcase)
+        if res ^ sol.linearizable:
+            wrong_test_no.append(i)
+
+    print(f"Tests failed: {len(wrong_test_no)}")
+    if len(wrong_test_no) == 0:
+        print("All tests passed")
+    else:
+        print(f"First failed: {str(wrong_test_no[:10]).strip('[]')} ...")
+
+    return wrong_test_no
@@ -2,9 +2,10 @@ from typing import Dict, DefaultDict, Optional, List, Set, Any, Tuple
 from collections import defaultdict
 from classes import *
 from graph import *
+from interval_index import RangeIndex, MaxIndex, any_open_overlap, any_strictly_inside, any_cross_overlap
+import bisect
 import math
 import copy
-import networkx as nx
 
 
 def populate_call_bins(
@@ -78,63 +79,66 @@ def make_blocks(sort_by_var: Dict[int, List[Call]], intervals: Dict[int, I], tru
 
     # Step 0: Initialize
     # Step 0.1: Merge true cases
-    merged_intervals: Dict[Tuple[int] | int, I] = copy.deepcopy(intervals)  # type: ignore
+    merged_intervals: Dict[Tuple[int] | int, I] = dict(intervals)  # type: ignore
 
     for true_cas_group in true_cas_var_groups:
         joined_ops = {true_cas_group[0]: [op for var in true_cas_group for op in sort_by_var[var]]}
-        intervals = make_intervals(joined_ops)
-        merged_intervals[tuple(true_cas_group)] = intervals[true_cas_group[0]]
+        merged_intervals[tuple(true_cas_group)] = make_intervals(joined_ops)[true_cas_group[0]]
         for var in true_cas_group:
             del merged_intervals[var]
 
-    blocks: List[List[Tuple[int] | int]] = []
-    forward_intervals: Dict[Tuple[int] | int, I] = {var: interval for var,
-                                                    interval in merged_intervals.items() if not interval.reversed}
-    reverse_intervals: Dict[Tuple[int] | int, I] = {
-        var: interval for var, interval in merged_intervals.items() if interval.reversed}
-    # print(forward_intervals)
-    # print(reverse_intervals)
+    forward_vars = [var for var, interval in merged_intervals.items() if not interval.reversed]
+    reverse_vars = [var for var, interval in merged_intervals.items() if interval.reversed]
+
     # Step 1: Skeleton. All forward intervals are in different blocks
-    for forward_var in forward_intervals:
-        blocks.append([forward_var])
+    blocks: List[List[Tuple[int] | int]] = [[forward_var] for forward_var in forward_vars]
 
     # Step 2.1: Reversed intervals that contain a forward interval get added to the block and get marked.
+    # The forward intervals sorted by start are indexed by their end,
+    # those contained in a reversed interval start in a range of this order and end before it.
+    by_start = sorted(range(len(forward_vars)), key=lambda b: merged_intervals[forward_vars[b]].start)
+    by_start_starts = [merged_intervals[forward_vars[b]].start for b in by_start]
+    by_start_ends = RangeIndex([merged_intervals[forward_vars[b]].end for b in by_start])
 
     # 0 = not marked
     # 1 = marked (cannot have a block of its own)
-    isMarked: Dict[I, bool] = {interval: False for interval in reverse_intervals.values()}
-    for var, reverse_interval in reverse_intervals.items():
-        for forward_block in blocks:
-            forward_interval = merged_intervals[forward_block[0]]
-            if forward_interval.isContainedIn(reverse_interval):
-                forward_block.append(var)
-                isMarked[reverse_interval] = True
+    isMarked: Dict[Tuple[int] | int, bool] = {var: False for var in reverse_vars}
+    for var in reverse_vars:
+        reverse_interval = merged_intervals[var]
+        lo = bisect.bisect_left(by_start_starts, reverse_interval.start)
+        hi = bisect.bisect_right(by_start_starts, reverse_interval.end)
+        for pos in by_start_ends.report_below(lo, hi, reverse_interval.end, strict=False):
+            blocks[by_start[pos]].append(var)
+            isMarked[var] = True
 
     # Step 2.2: Clique problem in P time, no problemo
-    rev_intervals_map = {interval: var for var, interval in reverse_intervals.items()}
+    # Reversed intervals are visited by end. Interval i is grouped with the following intervals j, up to the first
+    # one that starts after i ends, unless their intersection [max(i.start, j.start), i.end] lies in a forward interval.
+    # That is the case iff max(i.start, j.start) >= threshold, the earliest start of a forward interval ending after i.
+    by_end_vars = sorted(reverse_vars, key=lambda v: merged_intervals[v].end)
+    by_end_starts = RangeIndex([merged_intervals[v].start for v in by_end_vars])
+    forward_by_end = sorted((merged_intervals[v] for v in forward_vars), key=lambda x: x.end)
+    forward_ends = [interval.end for interval in forward_by_end]
+    # suffix_min_start[k] = earliest start among the forward intervals forward_by_end[k:]
+    suffix_min_start = [math.inf] * (len(forward_by_end) + 1)
+    for k in range(len(forward_by_end) - 1, -1, -1):
+        suffix_min_start[k] = min(suffix_min_start[k + 1], forward_by_end[k].start)
+
     new_blocks: List[List[Tuple[int] | int]] = []
-    for interval_i in sorted(isMarked.copy(), key=lambda x: x.end):
-        intersection_vars: List[Tuple[int] | int] = [rev_intervals_map[interval_i]]
-        for interval_j in sorted(isMarked.copy(), key=lambda x: x.end):
-            if interval_i == interval_j:
-                continue
-            if interval_j.start > interval_i.end:
-                break
-            if interval_i.isIntersecting(interval_j):
-                intersection = interval_i.intersection(interval_j)
-                for forward_interval in forward_intervals.values():
-                    if intersection.isContainedIn(forward_interval):
-                        break
-                else:
-                    intersection_vars.append(rev_intervals_map[interval_j])
-
-        if not all(isMarked[merged_intervals[v]] for v in intersection_vars):
+    for pos_i, var_i in enumerate(by_end_vars):
+        interval_i = merged_intervals[var_i]
+        intersection_vars: List[Tuple[int] | int] = [var_i]
+        threshold = suffix_min_start[bisect.bisect_left(forward_ends, interval_i.end)]
+        if interval_i.start < threshold:
+            last_j = by_end_starts.first_above(pos_i + 1, interval_i.end)
+            for pos_j in by_end_starts.report_below(pos_i + 1, last_j, threshold):
+                intersection_vars.append(by_end_vars[pos_j])
+
+        if not all(isMarked[v] for v in intersection_vars):
             new_blocks.append(intersection_vars)
 
         for v in intersection_vars:
-            isMarked[merged_intervals[v]] = True
-
-        del isMarked[interval_i]
+            isMarked[v] = True
 
     blocks += new_blocks
 
@@ -158,26 +162,31 @@ def basic_true_cas_checks(true_cases: List[CallCAS]):
 
 
 def has_loop(true_cases: List[CallCAS]):
-    graph = {}
+    graph: Dict[int, List[int]] = {}
     for c in true_cases:
         if c.compare not in graph:
             graph[c.compare] = []
         graph[c.compare].append(c.swap)
 
-    def dfs(node, visited):
-        if node in visited:
-            return True
-        visited.add(node)
-        if node not in graph:
-            return False
-        for child in graph[node]:
-            if dfs(child, visited):
+    # iterative dfs, a node is grey while it is on the stack and black once all its children are done
+    GREY, BLACK = 1, 2
+    color: Dict[int, int] = {}
+    for root in graph:
+        if root in color:
+            continue
+        color[root] = GREY
+        stack = [(root, iter(graph[root]))]
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                color[node] = BLACK
+                stack.pop()
+            elif color.get(child) == GREY:
                 return True
-        return False
-
-    for node in graph:
-        if dfs(node, set()):
-            return True
+            elif child not in color:
+                color[child] = GREY
+                stack.append((child, iter(graph.get(child, ()))))
     return False
 
 
@@ -188,15 +197,15 @@ def multiple_roots(true_cases: List[CallCAS]):
 
 
 def io_check(intervals: Dict[int, I]):
-    for var in intervals:
-        same_var_interval = intervals[var]
-        last_call = same_var_interval.start if same_var_interval.reversed else same_var_interval.end
-        first_return = same_var_interval.end if same_var_interval.reversed else same_var_interval.start
-        for i_var, interval in intervals.items():
-            if i_var == var or interval.reversed:
-                continue
-            if first_return < interval.end and last_call > interval.start:
-                return False
+    """
+    fails if two forward intervals overlap, or if a reversed interval lies strictly inside a forward interval
+    """
+    forward_intervals = [interval for interval in intervals.values() if not interval.reversed]
+    reverse_intervals = [interval for interval in intervals.values() if interval.reversed]
+    if any_open_overlap(forward_intervals):
+        return False
+    if any_strictly_inside(reverse_intervals, forward_intervals):
+        return False
 
     return True
 
@@ -214,23 +223,57 @@ def topological_true_cas_sort(true_cases: List[CallCAS]):
     for c in true_cases:
         graph[c.compare] = c.swap
 
+    var_order, _ = _chain_post_order(graph)
+
+    indexed_var_order = {var: i for i, var in enumerate(reversed(var_order))}
+    true_cases.sort(key=lambda c: indexed_var_order[c.compare])
+
+
+def _chain_post_order(graph: Dict[int, int]) -> Tuple[List[int], bool]:
+    """
+    dfs post order of a graph where every node has at most one child, following each chain iteratively\n
+    also returns whether there is a loop, i.e. a chain that runs back into itself
+    """
     var_order: List[int] = []
     visited = set()
+    has_loop = False
+    for node in graph:
+        chain: List[int] = []
+        on_chain = set()
+        while node not in visited:
+            visited.add(node)
+            on_chain.add(node)
+            chain.append(node)
+            if node not in graph:
+                break
+            node = graph[node]
+        else:
+            has_loop = has_loop or node in on_chain
+        var_order.extend(reversed(chain))
+    return var_order, has_loop
 
-    def dfs(node):
-        if node in visited:
-            return
-        visited.add(node)
-        if node in graph:
-            dfs(graph[node])
-        var_order.append(node)
 
-    for node in graph:
-        dfs(node)
+def analyze_true_cas(true_cases: List[CallCAS]) -> Optional[List[List[int]]]:
+    """
+    basic_true_cas_checks, topological_true_cas_sort and make_true_cas_var_groups in a single O(V + E) pass\n
+    Returns None if the checks fail, otherwise sorts true_cases in place and returns the var groups
+    """
+    graph: Dict[int, int] = {}
+    for c in true_cases:
+        if c.compare in graph:
+            # multiple roots
+            return None
+        graph[c.compare] = c.swap
+
+    var_order, has_loop = _chain_post_order(graph)
+    if has_loop:
+        return None
 
     indexed_var_order = {var: i for i, var in enumerate(reversed(var_order))}
     true_cases.sort(key=lambda c: indexed_var_order[c.compare])
 
+    return make_true_cas_var_groups(true_cases)
+
 
 def ordAfter(blocks: List[List[int]], var1: int, var2: int):
     """
@@ -253,22 +296,22 @@ def ordAfter(blocks: List[List[int]], var1: int, var2: int):
 
 
 def isAny_cas_intersect_write(false_cases: List[CallCAS], writes: Dict[int, CallWrite | CallCAS]):
-    for c in false_cases:
-        for w in writes.values():
-            if I(c.start, c.end).isIntersecting(I(w.start, w.end)):
-                return True
-    return False
+    return any_cross_overlap([I(c.start, c.end) for c in false_cases], [I(w.start, w.end) for w in writes.values()])
 
 
 def make_true_cas_var_groups(true_cases: List[CallCAS]):
     true_cas_var_groups: List[List[int]] = []
+    # last var -> indices of the groups ending with it, a cas extends the first of them
+    groups_by_last: Dict[int, List[int]] = {}
     for true_cas in true_cases:
-        for group in true_cas_var_groups:
-            if true_cas.compare == group[-1]:
-                group.append(true_cas.swap)
-                break
+        group_indices = groups_by_last.get(true_cas.compare)
+        if group_indices:
+            group_i = group_indices.pop(0)
+            true_cas_var_groups[group_i].append(true_cas.swap)
         else:
+            group_i = len(true_cas_var_groups)
             true_cas_var_groups.append([true_cas.compare, true_cas.swap])
+        bisect.insort(groups_by_last.setdefault(true_cas.swap, []), group_i)
     return true_cas_var_groups
 
 
@@ -346,51 +389,74 @@ def get_false_cas_resolvers(
         blocks: List[List[Tuple[int] | int]],
         writes: Dict[int, CallWrite | CallCAS],
         intervals: Dict[int, I]):
-
+    """
+    For every false CAS, the vars whose write it can read.\n
+    The blocks are walked up to the first one with a write that starts before the false cas ends and a call after it,
+    the available writes are reset at the last block before that with a return before the false cas starts.
+    Both blocks are found by a sweep over the false cases sorted by end, and only the blocks in between where a write
+    has started are expanded.
+    """
     false_cases.sort(key=lambda x: x.end)
+
+    # per var summary
+    first_return = {var: min(c.end for c in calls) for var, calls in sort_by_var.items()}
+    last_call = {var: interval.start if interval.reversed else interval.end for var, interval in intervals.items()}
+    write_start = {var: w.start for var, w in writes.items()}
+
+    expanded = [_expand_list(merged_block) for merged_block in blocks]
+    true_cas_tuples = [[t for t in merged_block if isinstance(t, tuple)] for merged_block in blocks]
+    block_first_return = RangeIndex([min(first_return[var] for var in block) for block in expanded])
+    block_first_write = RangeIndex([min(write_start[var] for var in block) for block in expanded])
+
+    # (block, var, latest start of a false cas that keeps the var), in block order
+    # a var of a true cas chain is dropped once a later var of the chain has returned before the false cas starts
+    members: List[Tuple[int, int, float]] = []
+    for block_i, merged_block in enumerate(blocks):
+        for t in merged_block:
+            if not isinstance(t, tuple):
+                members.append((block_i, t, math.inf))
+                continue
+            later_return = math.inf
+            chain: List[Tuple[int, int, float]] = []
+            for var in reversed(t):
+                chain.append((block_i, var, later_return))
+                later_return = min(later_return, first_return[var])
+            members.extend(reversed(chain))
+
+    # members whose write started before the current false cas ends and whose var is called after it
+    active = MaxIndex(len(members))
+    by_write_start = sorted(range(len(members)), key=lambda m: write_start[members[m][1]])
+    by_last_call = sorted(range(len(members)), key=lambda m: last_call[members[m][1]])
+    started = 0
+    ended = 0
+
     false_cas_var_resolver: Dict[CallCAS, Set[int]] = {}
     for false_cas in false_cases:
+        while started < len(members) and write_start[members[by_write_start[started]][1]] < false_cas.end:
+            m = by_write_start[started]
+            if last_call[members[m][1]] >= false_cas.end:
+                active.update(m, members[m][2])
+            started += 1
+        while ended < len(members) and last_call[members[by_last_call[ended]][1]] < false_cas.end:
+            active.update(by_last_call[ended], -math.inf)
+            ended += 1
+
+        # the walk stops at the first block with an active member, or right away if the false cas ends before 0
+        m = 0 if false_cas.end <= 0 else active.first_at_least(false_cas.start)
+        last_block = members[m][0] if m < len(members) else len(blocks) - 1
+        first_block = max(block_first_return.last_below(last_block + 1, false_cas.start), 0)
+
+        # blocks where no write has started yet add nothing
         available_writes: List[int] = []
-        block_i = 0
-        while block_i < len(blocks):
-            merged_block = blocks[block_i]
-            block = _expand_list(merged_block)
-
-            if min((min(c.end for c in sort_by_var[var]) for var in block)) < false_cas.start:
-                available_writes.clear()
-
-            writes_in_block = {var for var in block if writes[var].start < false_cas.end}
-            true_cas_tuples = [t for t in merged_block if isinstance(t, tuple)]
-
-            for true_cas in true_cas_tuples:
-                cutoff_var = max(
-                    (var for var in true_cas if min(c.end for c in sort_by_var[var]) < false_cas.start),
-                    key=lambda x: true_cas.index(x), default=-1)
-                if cutoff_var == -1:
-                    continue
-
-                cutoff_i = true_cas.index(cutoff_var)
+        for block_i in block_first_write.report_below(first_block, last_block + 1, false_cas.end):
+            writes_in_block = {var for var in expanded[block_i] if write_start[var] < false_cas.end}
+            for true_cas in true_cas_tuples[block_i]:
+                cutoff_i = next(
+                    (i for i in range(len(true_cas) - 1, -1, -1) if first_return[true_cas[i]] < false_cas.start), 0)
                 for var in true_cas[:cutoff_i]:
                     writes_in_block.discard(var)
-
             available_writes.extend(writes_in_block)
 
-            # if len(writes_in_block) == 0:
-            #     break
-
-            line = 0
-            for var in writes_in_block:
-                interval = intervals[var]
-                if interval.reversed:
-                    line = max(line, interval.start)
-                else:
-                    line = max(line, interval.end)
-
-            if false_cas.end > line:
-                block_i += 1
-            else:
-                break
-
         # if the false cas is fully contained in a forward interval then the only available write is of that interval
         for var in available_writes.copy():
             interval = intervals[var]
@@ -418,32 +484,28 @@ def get_false_cas_resolvers(
 
 
 def false_cas_group_check(false_cas_var_resolver: Dict[CallCAS, Set[int]], writes: Dict[int, CallWrite | CallCAS]):
-    writes_ret = [0] + sorted([w.end for w in writes.values()]) + [math.inf]
+    """
+    The false cases between the same two consecutive write returns must have a common resolver.\n
+    The false cases and the write returns are merged in one sorted pass.
+    """
+    writes_ret = sorted(w.end for w in writes.values())
+    false_cases = sorted(false_cas_var_resolver, key=lambda x: x.end)
+
+    # the false cas lies between writes_ret[writes_ret_i - 1] and writes_ret[writes_ret_i]
     writes_ret_i = 0
-    latest_write_ret: List[int] = []
-    false_cases = list(false_cas_var_resolver.keys())
-    false_cases.sort(key=lambda x: x.end)
+    group_i = -1
+    common_vars: Set[int] = set()
     for false_cas in false_cases:
-        while True:
-            if I(
-                false_cas.start, false_cas.end).isContainedIn(
-                I(writes_ret[writes_ret_i],
-                  writes_ret[writes_ret_i + 1])):
-                latest_write_ret.append(writes_ret_i)
-                break
-            else:
-                writes_ret_i += 1
-
-    false_cas_blocks_i: Dict[int, List[CallCAS]] = defaultdict(list)
-    for false_cas_i in range(len(false_cases)):
-        false_cas_blocks_i[latest_write_ret[false_cas_i]].append(false_cases[false_cas_i])
-
-    false_cas_blocks = list(false_cas_blocks_i.values())
-    for false_cas_block in false_cas_blocks:
-        false_cas_block_vars = set.intersection(*[false_cas_var_resolver[false_cas] for false_cas in false_cas_block])
-        if len(false_cas_block_vars) == 0:
-            return False
-    return True
+        while writes_ret_i < len(writes_ret) and writes_ret[writes_ret_i] < false_cas.end:
+            writes_ret_i += 1
+        if writes_ret_i != group_i:
+            if group_i != -1 and len(common_vars) == 0:
+                return False
+            group_i = writes_ret_i
+            common_vars = set(false_cas_var_resolver[false_cas])
+        else:
+            common_vars &= false_cas_var_resolver[false_cas]
+    return group_i == -1 or len(common_vars) > 0
 
 
 def _expand_list(l: List[Tuple[int] | int]) -> List[int]:
@@ -467,7 +529,7 @@ def order_lambda(c: Call, v: int):
     return c.start
 
 
-def set_order(sort_by_var: Dict[int, List[Call]], true_cas_var_groups: List[List[int]]):
+def set_order(sort_by_var: Dict[int, List[Call]], true_cas_var_groups: List[List[int]], verbose=False):
     # now we just need to set the order attribute of each call
     intervals: Dict[int, I] = make_intervals(sort_by_var)
     blocks = make_blocks(sort_by_var, intervals, true_cas_var_groups)
@@ -477,6 +539,7 @@ def set_order(sort_by_var: Dict[int, List[Call]], true_cas_var_groups: List[List
             sort_by_var[var].sort(key=lambda x: order_lambda(x, var))
             for call in sort_by_var[var]:
                 call.order = order
-                print(f"Set order of {str(call)} to {order}")
+                if verbose:
+                    print(f"Set order of {str(call)} to {order}")
                 if order_lambda(call, var) != math.inf:
                     order += 1
@@ -0,0 +1,179 @@
+from typing import Dict, Optional, List, Set, Any, Tuple, Callable
+from classes import *
+
+
+def make_thread_lists(spec: List[Call]) -> List[List[Call]]:
+    """
+    Per thread list of calls, each sorted by start time
+    """
+    threads: Dict[int, List[Call]] = {}
+    for c in spec:
+        threads.setdefault(c.threadno, []).append(c)
+    thread_lists = list(threads.values())
+    for t in thread_lists:
+        t.sort(key=lambda x: x.start)
+    return thread_lists
+
+
+def get_candidates(thread_lists: List[List[Call]], cursors: List[int]) -> List[int]:
+    """
+    Returns the threads whose next call can be linearized next.\n
+    A call is a candidate if it starts before the earliest return among the next calls of all threads,
+    otherwise the call that returns first would have to be linearized after it.
+    """
+    ref: Optional[Call] = None
+    for t, thread in enumerate(thread_lists):
+        if cursors[t] < len(thread) and (ref is None or thread[cursors[t]].end <= ref.end):
+            ref = thread[cursors[t]]
+    if ref is None:
+        return []
+
+    candidates: List[int] = []
+    for t, thread in enumerate(thread_lists):
+        if cursors[t] < len(thread):
+            c = thread[cursors[t]]
+            if c is ref or c.start < ref.end:
+                candidates.append(t)
+    return candidates
+
+
+class WGLSearch:
+    """
+    Search state shared by all the branches of a memoized search over one history.\n
+    A configuration is the set of linearized calls (as a bitset) together with the fingerprint of the state.
+    Every configuration is explored at most once, as the search from a configuration does not depend on how it was reached.\n
+    should_stop is polled at every node, the search raises SearchCancelled once it returns True.
+    stats counts the nodes, the configurations found in the cache, the widest candidate set and the snapshots.
+    """
+
+    def __init__(
+            self, spec: List[Call], should_stop: Optional[Callable[[], bool]] = None,
+            stats: Optional[SearchStats] = None):
+        self.thread_lists: List[List[Call]] = make_thread_lists(spec)
+        # bit of the k-th call of thread t is bit_offsets[t] + k
+        self.bit_offsets: List[int] = []
+        offset = 0
+        for thread in self.thread_lists:
+            self.bit_offsets.append(offset)
+            offset += len(thread)
+        self.visited: Set[Tuple[int, Any]] = set()
+        self.should_stop = should_stop
+        self.stats = stats
+        self.cursors: List[int] = []
+        self.path: List[Call] = []
+
+    def mask_of(self, cursors: List[int]) -> int:
+        mask = 0
+        for t, cursor in enumerate(cursors):
+            mask |= ((1 << cursor) - 1) << self.bit_offsets[t]
+        return mask
+
+    def search(self, cursors: List[int], state: State) -> Optional[List[Call]]:
+        """
+        Searches from the configuration where the first cursors[t] calls of every thread t are linearized.\n
+        Returns the calls linearized after that configuration, or None if it cannot be completed.
+        """
+        mask = self.mask_of(cursors)
+        config = (mask, state.fingerprint())
+        if config in self.visited:
+            if self.stats is not None:
+                self.stats.cache_hits += 1
+            return None
+        self.visited.add(config)
+
+        self.cursors = list(cursors)
+        self.path = []
+        if self._helper(mask, state):
+            return self.path
+        return None
+
+    def _node(self, mask: int, state: State) -> Optional[List[Any]]:
+        """
+        frame of the search node [mask, state, candidates, next candidate, snapshot, whether a candidate is explored],
+        or None if every call is linearized
+        """
+        if self.should_stop is not None and self.should_stop():
+            raise SearchCancelled()
+
+        candidates = get_candidates(self.thread_lists, self.cursors)
+        if self.stats is not None:
+            self.stats.nodes += 1
+            self.stats.max_width = max(self.stats.max_width, len(candidates))
+        if not candidates:
+            return None
+        return [mask, state, candidates, 0, None, False]
+
+    def _helper(self, mask: int, state: State) -> bool:
+        """
+        depth first search with an explicit stack of frames instead of recursion, so that the depth is not bounded by
+        the recursion limit. A frame with a candidate explored below it undoes it from its snapshot when it is back on top.
+        """
+        thread_lists, cursors, path, stats = self.thread_lists, self.cursors, self.path, self.stats
+        root = self._node(mask, state)
+        if root is None:
+            return True
+
+        stack: List[List[Any]] = [root]
+        while stack:
+            frame = stack[-1]
+            mask, state, candidates, i, snapshot, explored = frame
+            if explored:
+                path.pop()
+                cursors[candidates[i - 1]] -= 1
+                state.restore(snapshot)
+                frame[5] = False
+
+            while i < len(candidates):
+                t = candidates[i]
+                i += 1
+                c = thread_lists[t][cursors[t]]
+                if stats is not None:
+                    stats.snapshots += 1
+                snapshot = state.snapshot()
+                optional_state = c.exec(state)
+                if optional_state is None:
+                    state.restore(snapshot)
+                    continue
+                new_state, _ = optional_state
+
+                new_mask = mask | (1 << (self.bit_offsets[t] + cursors[t]))
+                config = (new_mask, new_state.fingerprint())
+                if config in self.visited:
+                    if stats is not None:
+                        stats.cache_hits += 1
+                    state.restore(snapshot)
+                    continue
+                self.visited.add(config)
+                cursors[t] += 1
+                path.append(c)
+                frame[3:] = i, snapshot, True
+                child = self._node(new_mask, new_state)
+                if child is None:
+                    return True
+                stack.append(child)
+                break
+            else:
+                stack.pop()
+
+        return False
+
+
+def linearize_wgl(
+        spec: List[Call], state: State, stats: Optional[SearchStats] = None,
+        should_stop: Optional[Callable[[], bool]] = None) -> Optional[List[Call]]:
+    """
+    Takes the same input as utils.linearize_generic but stops at the first linearization found,
+    and never explores the same configuration twice (see WGLSearch).\n
+    Returns the linearization and sets the order attribute of the calls, or None if the history is not linearizable.
+    Raises SearchCancelled once should_stop returns True.
+    """
+    search = WGLSearch(spec, should_stop, stats)
+    if stats is not None:
+        stats.state_copies += 1
+    path = search.search([0] * len(search.thread_lists), state.copy())
+    if path is None:
+        return None
+
+    for i, c in enumerate(path):
+        c.order = i + 1
+    return path
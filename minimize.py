@@ -0,0 +1,160 @@
+from typing import Dict, Optional, List, Set, Any, Tuple, Callable, FrozenSet
+from classes import *
+from batch import check_verdict
+import multiprocessing
+import copy
+
+
+# stand for "some value of the register" and "some non zero increment of the counter", for the calls that only
+# depend on the state being set, not on a particular value
+_REGISTER = object()
+_COUNTER = object()
+
+
+def _values(spec: List[Call]) -> Tuple[Set, Set]:
+    """
+    (values written, enqueued, pushed or added, values read, dequeued, popped, removed or replaced by a cas)\n
+    for a map the values are (key, value) pairs\n
+    A false cas needs the register to hold some value, a failed add needs its value in the set,
+    and a fetch add that returns something else than 0 needs an earlier non zero increment.
+    """
+    produced: Set = set()
+    observed: Set = set()
+    for c in spec:
+        if isinstance(c, CallWrite):
+            produced.update((c.arg, _REGISTER))
+        elif isinstance(c, (CallEnq, CallPush)):
+            produced.add(c.arg)
+        elif isinstance(c, (CallRead, CallDeq, CallPop)):
+            observed.add(c.arg)
+        elif isinstance(c, CallCAS) and c.cond:
+            produced.update((c.swap, _REGISTER))
+            observed.add(c.compare)
+        elif isinstance(c, CallCAS):
+            observed.add(_REGISTER)
+        elif isinstance(c, CallAdd):
+            (produced if c.cond else observed).add(c.arg)
+        elif isinstance(c, (CallRemove, CallContains)) and c.cond:
+            observed.add(c.arg)
+        elif isinstance(c, CallFetchAdd):
+            if c.arg != 0:
+                produced.add(_COUNTER)
+            if c.ret != 0:
+                observed.add(_COUNTER)
+        elif isinstance(c, CallPut):
+            produced.add((c.key, c.value))
+        elif isinstance(c, CallGet) and c.value is not None:
+            observed.add((c.key, c.value))
+    return produced, observed
+
+
+def _split(units: List[List[int]], n: int) -> List[List[List[int]]]:
+    chunks = []
+    start = 0
+    for i in range(n):
+        end = start + (len(units) - start) // (n - i)
+        chunks.append(units[start:end])
+        start = end
+    return chunks
+
+
+class _Minimizer:
+    """
+    Delta debugging over a failing history. A subset of the calls is identified by the frozenset of their positions,
+    and every subset is checked at most once.\n
+    A subset is only kept if it still fails and does not drop the call that produces a value one of its calls observes,
+    otherwise a lone read of a value that is never written would always be the minimal failing history.
+    """
+
+    def __init__(self, spec: List[Call], checker: Callable[[List[Call]], bool], pool: Optional[Any]):
+        self.spec = spec
+        self.checker = checker
+        self.pool = pool
+        self.cache: Dict[FrozenSet[int], bool] = {}
+        produced, observed = _values(spec)
+        # values observed without being produced in the full history, e.g. the initial value
+        self.orphans = observed - produced
+
+    def sub_spec(self, key: FrozenSet[int]) -> List[Call]:
+        return [copy.copy(self.spec[i]) for i in sorted(key)]
+
+    def is_closed(self, key: FrozenSet[int]) -> bool:
+        produced, observed = _values([self.spec[i] for i in key])
+        return observed - produced <= self.orphans
+
+    def fails(self, key: FrozenSet[int]) -> bool:
+        if key not in self.cache:
+            self.cache[key] = self.is_closed(key) and not self.checker(self.sub_spec(key))
+        return self.cache[key]
+
+    def first_failing(self, candidates: List[List[List[int]]]) -> Optional[int]:
+        """
+        index of the first candidate that fails. With a pool, all the candidates that are not cached are checked at once
+        """
+        keys = [frozenset(i for unit in candidate for i in unit) for candidate in candidates]
+        if self.pool is not None:
+            todo = list({key: None for key in keys if key not in self.cache and self.is_closed(key)})
+            verdicts = self.pool.map(self.checker, [self.sub_spec(key) for key in todo])
+            for key, verdict in zip(todo, verdicts):
+                self.cache[key] = not verdict
+        for i, key in enumerate(keys):
+            if self.fails(key):
+                return i
+        return None
+
+    def ddmin(self, units: List[List[int]]) -> List[List[int]]:
+        """
+        Returns a failing list of units that is 1-minimal among the closed subsets: removing any single unit
+        makes it pass or leaves a call that observes a value no remaining call produces (see is_closed)
+        """
+        n = 2
+        while len(units) >= 2:
+            chunks = _split(units, n)
+            complements = [[unit for j, chunk in enumerate(chunks) if j != i for unit in chunk] for i in range(n)]
+            # with two chunks the complements are the chunks themselves
+            candidates = chunks + complements if n > 2 else chunks
+            found = self.first_failing(candidates)
+            if found is not None and found < n:
+                units = chunks[found]
+                n = 2
+            elif found is not None:
+                units = complements[found - n]
+                n = max(n - 1, 2)
+            elif n < len(units):
+                n = min(2 * n, len(units))
+            else:
+                break
+        return units
+
+
+def minimize(
+        spec: List[Call],
+        checker: Callable[[List[Call]], bool] = check_verdict,
+        processes: Optional[int] = 1) -> List[Call]:
+    """
+    Shrinks a history that is not linearizable to a smaller one that still is not:
+    whole threads are dropped first, then single calls.
+    The result is 1-minimal among the closed subsets only: removing a call may still fail,
+    but then it orphans a value another call observes (see _Minimizer).\n
+    checker returns the verdict of a history, by default checker.check picks the fastest engine that applies.
+    With processes other than 1, the candidate subsets of every round are checked in parallel (all cores for None),
+    checker must then be a module level function so that it can be sent to the workers.\n
+    The calls of spec are not modified, the returned calls are the ones of spec in the same order.
+    """
+    def run(pool: Optional[Any]) -> List[Call]:
+        minimizer = _Minimizer(spec, checker, pool)
+        everything = frozenset(range(len(spec)))
+        if not minimizer.fails(everything):
+            raise ValueError("The history is linearizable, there is nothing to minimize")
+
+        threads: Dict[int, List[int]] = {}
+        for i, c in enumerate(spec):
+            threads.setdefault(c.threadno, []).append(i)
+        units = minimizer.ddmin(list(threads.values()))
+        units = minimizer.ddmin([[i] for unit in units for i in unit])
+        return [spec[i] for i in sorted(i for unit in units for i in unit)]
+
+    if processes == 1:
+        return run(None)
+    with multiprocessing.Pool(processes) as pool:
+        return run(pool)
@@ -0,0 +1,147 @@
+from typing import Dict, Deque, Optional, List, Any, Tuple, Iterable
+from collections import deque
+from classes import *
+import math
+
+
+class OnlineChecker:
+    """
+    Checks a history while it is being recorded, from call and return events given in timestamp order.\n
+    A configuration is the state together with the returned calls that are already linearized but not settled yet.
+    A returned call is settled once every call that started before its return has returned too: the configurations
+    are extended with the calls that may come before it and only the ones where it is linearized are kept.
+    Settled calls are dropped, so the memory only depends on how many calls are concurrent, not on the history length.\n
+    As in linearize_wgl, a call that starts exactly when another returns comes after it, so on equal timestamps the
+    returns must be given before the calls.\n
+    A call that never returns may or may not have taken effect, so at the end it is linearized only where it helps.
+    """
+
+    def __init__(self, state: State):
+        self.events = 0
+        # (event index, pending call) of every thread
+        self.invoked: Dict[int, Tuple[int, Call]] = {}
+        # returned calls that are not settled yet, by return time: (event index, call)
+        self.returned: Deque[Tuple[int, Call]] = deque()
+        # calls that never returned, once the history is finished: (event index, call)
+        self.optional: List[Tuple[int, Call]] = []
+        # (state fingerprint, event indices of the linearized returned calls) -> state
+        self.configs: Dict[Tuple[Any, frozenset], State] = {(state.fingerprint(), frozenset()): state.copy()}
+        self.violation: Optional[Tuple[int, Call]] = None
+        self.time = -math.inf
+
+    @property
+    def linearizable(self) -> bool:
+        """verdict for the calls settled so far"""
+        return self.violation is None
+
+    def _tick(self, time: float):
+        if time < self.time:
+            raise ValueError(f"Event at {time} given after an event at {self.time}")
+        self.time = time
+        self.events += 1
+
+    def invoke(self, c: Call) -> bool:
+        """
+        The call c of c.threadno starts at c.start, its arguments are the ones it is invoked with
+        (the end and the returned value only matter once it returns). Returns False once a violation has been found.
+        """
+        if c.threadno in self.invoked:
+            raise ValueError(f"Thread {c.threadno} already has a pending call")
+        self._tick(c.start)
+        self.invoked[c.threadno] = (self.events - 1, c)
+        return self.violation is None
+
+    def respond(self, c: Call) -> bool:
+        """
+        The pending call of c.threadno returns as c. Returns False once a violation has been found.
+        """
+        if c.threadno not in self.invoked:
+            raise ValueError(f"Thread {c.threadno} has no pending call")
+        self._tick(c.end)
+        del self.invoked[c.threadno]
+        self.returned.append((self.events - 1, c))
+        self._settle()
+        return self.violation is None
+
+    def finish(self) -> bool:
+        """
+        Ends the history. Calls that never returned may be linearized anywhere after their start, or not at all.
+        """
+        self.optional.extend(self.invoked.values())
+        self.invoked.clear()
+        self._settle()
+        return self.violation is None
+
+    def _settle(self):
+        earliest_pending = min((c.start for _, c in self.invoked.values()), default=math.inf)
+        while self.violation is None and self.returned and earliest_pending >= self.returned[0][1].end:
+            self._settle_first()
+
+    def _settle_first(self):
+        i, c = self.returned[0]
+        # every returned call that starts before c returns may be linearized before it
+        concurrent = [(j, d) for j, d in self.returned if j == i or d.start < c.end]
+        concurrent += [(j, d) for j, d in self.optional if d.start < c.end]
+
+        frontier = list(self.configs.items())
+        reached = dict(self.configs)
+        while frontier:
+            next_frontier: List[Tuple[Tuple[Any, frozenset], State]] = []
+            for (_, linearized), state in frontier:
+                if i in linearized:
+                    continue
+                for j, d in concurrent:
+                    if j in linearized:
+                        continue
+                    optional_state = d.exec(state.copy())
+                    if optional_state is None:
+                        continue
+                    new_state, _ = optional_state
+                    config = (new_state.fingerprint(), linearized | {j})
+                    if config not in reached:
+                        reached[config] = new_state
+                        next_frontier.append((config, new_state))
+            frontier = next_frontier
+
+        self.configs = {}
+        for (fingerprint, linearized), state in reached.items():
+            if i in linearized:
+                self.configs[(fingerprint, linearized - {i})] = state
+        self.returned.popleft()
+        if not self.configs:
+            self.violation = (i, c)
+
+
+def iter_events(spec: List[Call]) -> Iterable[Tuple[float, bool, Call]]:
+    """
+    (timestamp, True for the call and False for the return, call) for every call of a complete history,
+    in the order OnlineChecker expects them
+    """
+    # on equal timestamps: the returns, then the calls of length 0 each followed by its return, then the calls
+    events: List[Tuple[float, int, int, bool]] = []
+    for i, c in enumerate(spec):
+        if c.start == c.end:
+            events.append((c.start, 1, 2 * i, True))
+            events.append((c.end, 1, 2 * i + 1, False))
+        else:
+            events.append((c.start, 2, i, True))
+            events.append((c.end, 0, i, False))
+    events.sort()
+    for time, rank, pos, is_call in events:
+        yield time, is_call, spec[pos // 2 if rank == 1 else pos]
+
+
+def check_online(spec: List[Call], state: State) -> Optional[Tuple[int, Call]]:
+    """
+    Replays a complete history through an OnlineChecker.\n
+    Returns the index of the return event of the first call that could not be linearized and the call,
+    or None if the history is linearizable.
+    """
+    checker = OnlineChecker(state)
+    for time, is_call, c in iter_events(spec):
+        if is_call:
+            checker.invoke(c)
+        elif not checker.respond(c):
+            break
+    checker.finish()
+    return checker.violation
@@ -0,0 +1,112 @@
+from typing import Dict, Optional, List, Any, Tuple
+from classes import *
+from linearize_wgl import WGLSearch, SearchCancelled, get_candidates
+import multiprocessing
+
+# how many nodes a worker explores between two polls of the shared cancel event
+POLL_INTERVAL = 1024
+
+_worker_search: Optional[WGLSearch] = None
+_worker_thread_index: Dict[int, int] = {}
+
+
+def _init_worker(spec: List[Call], cancel: Any):
+    global _worker_search, _worker_thread_index
+    countdown = [POLL_INTERVAL]
+
+    def should_stop() -> bool:
+        countdown[0] -= 1
+        if countdown[0] > 0:
+            return False
+        countdown[0] = POLL_INTERVAL
+        return cancel.is_set()
+
+    # the cache of a worker is kept across all the subtrees it searches
+    _worker_search = WGLSearch(spec, should_stop)
+    _worker_thread_index = {thread[0].threadno: t for t, thread in enumerate(_worker_search.thread_lists)}
+
+
+def _search_subtree(subtree: Tuple[int, List[int], State]) -> Tuple[int, Optional[List[int]]]:
+    """
+    returns the threads of the calls linearized after the root of the subtree, or None if it has no linearization
+    """
+    assert _worker_search is not None
+    i, cursors, state = subtree
+    try:
+        path = _worker_search.search(cursors, state)
+    except SearchCancelled:
+        return i, None
+    if path is None:
+        return i, None
+    return i, [_worker_thread_index[c.threadno] for c in path]
+
+
+def split_search(search: WGLSearch, state: State, width: int):
+    """
+    Expands the search breadth first until there are at least width independent subtrees.\n
+    Returns (witness, []) if a linearization was found on the way, otherwise (None, subtrees) where a subtree is
+    (cursors, state, linearized calls). No subtrees means the history is not linearizable.
+    """
+    frontier: List[Tuple[List[int], State, List[Call]]] = [([0] * len(search.thread_lists), state, [])]
+    while frontier and len(frontier) < width:
+        next_frontier: List[Tuple[List[int], State, List[Call]]] = []
+        for cursors, state, prefix in frontier:
+            candidates = get_candidates(search.thread_lists, cursors)
+            if not candidates:
+                return prefix, []
+
+            for t in candidates:
+                c = search.thread_lists[t][cursors[t]]
+                optional_state = c.exec(state.copy())
+                if optional_state is None:
+                    continue
+                new_state, _ = optional_state
+
+                new_cursors = cursors.copy()
+                new_cursors[t] += 1
+                config = (search.mask_of(new_cursors), new_state.fingerprint())
+                if config in search.visited:
+                    continue
+                search.visited.add(config)
+                next_frontier.append((new_cursors, new_state, prefix + [c]))
+        frontier = next_frontier
+    return None, frontier
+
+
+def linearize_parallel(
+        spec: List[Call], state: State, processes: Optional[int] = None, width: Optional[int] = None) -> Optional[List[Call]]:
+    """
+    Same result as linearize_wgl, with the search split into subtrees that a pool of processes works through.\n
+    Idle workers pick up the next subtree, and as soon as one subtree yields a linearization all workers are stopped.
+    The configurations are deduplicated when the subtrees are made, and every worker keeps its cache across all the
+    subtrees it searches. The cache is not shared between processes, since a lossy shared filter could prune a
+    configuration that was never explored and wrongly report the history as not linearizable.
+    """
+    processes = processes or multiprocessing.cpu_count()
+    width = width or 8 * processes
+
+    search = WGLSearch(spec)
+    witness, subtrees = split_search(search, state.copy(), width)
+
+    if witness is None and subtrees:
+        cancel = multiprocessing.Event()
+        with multiprocessing.Pool(processes, _init_worker, (spec, cancel)) as pool:
+            tasks = [(i, cursors, state) for i, (cursors, state, _) in enumerate(subtrees)]
+            # the results are drained even after a witness, terminating a pool that is still handing out tasks
+            # can deadlock, and the remaining subtrees return at their next poll of cancel anyway
+            for i, suffix in pool.imap_unordered(_search_subtree, tasks):
+                if suffix is None or witness is not None:
+                    continue
+                cancel.set()
+                cursors, _, witness = subtrees[i]
+                cursors = cursors.copy()
+                for t in suffix:
+                    witness.append(search.thread_lists[t][cursors[t]])
+                    cursors[t] += 1
+
+    if witness is None:
+        return None
+
+    for i, c in enumerate(witness):
+        c.order = i + 1
+    return witness
@@ -0,0 +1,58 @@
+from typing import Dict, Optional, List, Any, Tuple, Callable
+from classes import *
+from linearize_wgl import linearize_wgl
+import math
+
+
+def split_by_key(spec: List[Call], key: Callable[[Call], Any]) -> Dict[Any, List[Call]]:
+    """
+    Buckets the calls by the object they act on.\n
+    key maps a call to its object, e.g. the key of a per-key map operation
+    """
+    sub_histories: Dict[Any, List[Call]] = {}
+    for c in spec:
+        sub_histories.setdefault(key(c), []).append(c)
+    return sub_histories
+
+
+def merge_linearizations(linearizations: List[List[Call]]) -> List[Call]:
+    """
+    Merges linearizations of independent sub-histories into one linearization of the whole history.\n
+    Every call gets the earliest linearization point that is not before its start nor before the point of
+    the previous call of its sub-history. That point is never after the end of the call, so sorting all calls
+    by their point respects the real time order across sub-histories.
+    """
+    points: List[Tuple[float, int, int, Call]] = []
+    for sub_i, linearization in enumerate(linearizations):
+        point = -math.inf
+        for pos, c in enumerate(linearization):
+            point = max(point, c.start)
+            points.append((point, sub_i, pos, c))
+    points.sort(key=lambda x: x[:3])
+    return [c for _, _, _, c in points]
+
+
+def linearize_partitioned(
+        spec: List[Call],
+        new_state: Callable[[], State],
+        key: Callable[[Call], Any],
+        engine: Callable[[List[Call], State], Optional[List[Call]]] = linearize_wgl) -> Optional[List[Call]]:
+    """
+    Linearizability is local: a history over independent objects is linearizable iff the sub-history of every
+    object is. Each sub-history is checked on its own with a fresh state from new_state, so the search cost is
+    the sum over the objects instead of the product.\n
+    Only sound when the calls with different keys act on different objects, which is not the case for the values
+    of a single StateIO register.\n
+    Returns the merged linearization and sets the order attribute of the calls, or None if any object fails.
+    """
+    linearizations: List[List[Call]] = []
+    for sub_history in split_by_key(spec, key).values():
+        linearization = engine(sub_history, new_state())
+        if linearization is None:
+            return None
+        linearizations.append(linearization)
+
+    merged = merge_linearizations(linearizations)
+    for i, c in enumerate(merged):
+        c.order = i + 1
+    return merged
@@ -0,0 +1,184 @@
+from typing import Dict, Optional, List, Any, Tuple
+from classes import *
+import asyncio
+import threading
+import time
+
+# (call type, arg0, arg1, cond, start, end) with arg0 and arg1 as in classes.encode_call
+Row = Tuple[type, Any, Any, bool, int, int]
+
+
+class Recorder:
+    """
+    Collects the calls made through the Recorded* wrappers, stamped with time.perf_counter_ns.\n
+    Every thread (or asyncio task if tasks is True) appends to its own buffer, so recording takes no lock
+    and does not serialize the threads under test. The buffers are merged into a history once at the end.
+    Each thread or task is numbered by the order of its first call.
+    """
+
+    def __init__(self, tasks: bool = False):
+        self.tasks = tasks
+        self._local = threading.local()
+        self._task_buffers: Dict[asyncio.Task, Tuple[int, List[Row]]] = {}
+        self._buffers: List[Tuple[int, List[Row]]] = []
+        # only taken when a thread or task records its first call
+        self._register_lock = threading.Lock()
+
+    def _new_buffer(self) -> Tuple[int, List[Row]]:
+        with self._register_lock:
+            buffer: Tuple[int, List[Row]] = (len(self._buffers) + 1, [])
+            self._buffers.append(buffer)
+        return buffer
+
+    def buffer(self) -> Tuple[int, List[Row]]:
+        """(threadno, rows) of the current thread or task"""
+        if self.tasks:
+            task = asyncio.current_task()
+            if task is None:
+                raise RuntimeError("Recorder(tasks=True) used outside of an asyncio task")
+            buffer = self._task_buffers.get(task)
+            if buffer is None:
+                buffer = self._task_buffers[task] = self._new_buffer()
+            return buffer
+
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = self._new_buffer()
+        return buffer
+
+    def history(self) -> List[Call]:
+        """
+        Merges the buffers into a history sorted by start time.\n
+        Should only be called once the recorded threads or tasks are done.
+        """
+        kinds = {call_type: kind for kind, call_type in enumerate(CALL_KINDS)}
+        spec: List[Call] = []
+        for threadno, rows in self._buffers:
+            for call_type, arg0, arg1, cond, start, end in rows:
+                spec.append(decode_call(kinds[call_type], threadno, arg0, arg1, cond, start, end))
+        spec.sort(key=lambda x: x.start)
+        return spec
+
+
+class AtomicCell:
+    """
+    Reference register with a linearizable compare_and_swap, for checking the harness itself
+    """
+
+    def __init__(self, value: Any = None):
+        self.value = value
+        self._lock = threading.Lock()
+
+    def load(self) -> Any:
+        return self.value
+
+    def store(self, value: Any):
+        # under the lock, so that a store cannot land between the compare and the swap of a compare_and_swap
+        with self._lock:
+            self.value = value
+
+    def compare_and_swap(self, compare: Any, swap: Any) -> bool:
+        with self._lock:
+            if self.value != compare:
+                return False
+            self.value = swap
+            return True
+
+
+class RecordedRegister:
+    """
+    Records the operations on a register with load, store and compare_and_swap methods (e.g. AtomicCell)
+    as CallRead, CallWrite and CallCAS.\n
+    StateIO starts unset, so a cell that holds a value before the threads start needs record_initial,
+    otherwise a read of that value is never linearizable.
+    """
+
+    def __init__(self, cell: Any, recorder: Recorder):
+        self.cell = cell
+        self.recorder = recorder
+
+    def record_initial(self):
+        """
+        Records the current value of the cell as a write by the calling thread, before the threads under test start.
+        The value cannot be None, which StateIO takes as the unset register.
+        """
+        value = self.cell.load()
+        if value is None:
+            raise ValueError("The initial value of a register cannot be None")
+        _, rows = self.recorder.buffer()
+        now = time.perf_counter_ns()
+        rows.append((CallWrite, value, 0, False, now, now))
+
+    def write(self, value: Any):
+        _, rows = self.recorder.buffer()
+        start = time.perf_counter_ns()
+        self.cell.store(value)
+        end = time.perf_counter_ns()
+        rows.append((CallWrite, value, 0, False, start, end))
+
+    def read(self) -> Any:
+        _, rows = self.recorder.buffer()
+        start = time.perf_counter_ns()
+        value = self.cell.load()
+        end = time.perf_counter_ns()
+        rows.append((CallRead, value, 0, False, start, end))
+        return value
+
+    def compare_and_swap(self, compare: Any, swap: Any) -> bool:
+        _, rows = self.recorder.buffer()
+        start = time.perf_counter_ns()
+        cond = self.cell.compare_and_swap(compare, swap)
+        end = time.perf_counter_ns()
+        rows.append((CallCAS, compare, swap, cond, start, end))
+        return cond
+
+
+class RecordedQueue:
+    """
+    Records the operations on a queue with put and get methods (e.g. queue.Queue) as CallEnq and CallDeq.\n
+    A get that raises (e.g. queue.Empty) is not recorded, as the queue specification has no failed dequeue.
+    """
+
+    def __init__(self, queue: Any, recorder: Recorder):
+        self.queue = queue
+        self.recorder = recorder
+
+    def enq(self, value: Any):
+        _, rows = self.recorder.buffer()
+        start = time.perf_counter_ns()
+        self.queue.put(value)
+        end = time.perf_counter_ns()
+        rows.append((CallEnq, value, 0, False, start, end))
+
+    def deq(self, *args, **kwargs) -> Any:
+        _, rows = self.recorder.buffer()
+        start = time.perf_counter_ns()
+        value = self.queue.get(*args, **kwargs)
+        end = time.perf_counter_ns()
+        rows.append((CallDeq, value, 0, False, start, end))
+        return value
+
+
+class AsyncRecordedQueue:
+    """
+    RecordedQueue for a queue whose put and get are coroutines (e.g. asyncio.Queue), to be used with Recorder(tasks=True)
+    """
+
+    def __init__(self, queue: Any, recorder: Recorder):
+        self.queue = queue
+        self.recorder = recorder
+
+    async def enq(self, value: Any):
+        _, rows = self.recorder.buffer()
+        start = time.perf_counter_ns()
+        await self.queue.put(value)
+        end = time.perf_counter_ns()
+        rows.append((CallEnq, value, 0, False, start, end))
+
+    async def deq(self) -> Any:
+        _, rows = self.recorder.buffer()
+        start = time.perf_counter_ns()
+        value = await self.queue.get()
+        end = time.perf_counter_ns()
+        rows.append((CallDeq, value, 0, False, start, end))
+        return value
@@ -0,0 +1,410 @@
+"""
+reference implementations of the repository before the rewrite, copied verbatim
+so that the tests can check that the new engines give the same verdicts
+"""
+from typing import Dict, DefaultDict, List, Set, Tuple
+from classes import *
+from collections import defaultdict
+from utils import sort_by_thread
+from linearize_io_helper import populate_call_bins
+import copy
+import math
+
+
+def linearize_generic(spec: List[Call], state: State):
+    threads: DefaultDict[int, List[Call]] = sort_by_thread(spec)
+
+    def helper(threads: DefaultDict[int, List[Call]], state: State):
+        res: List[List[Call]] = []
+        first_op_per_thread = [t[0] for t in threads.values() if t]
+        if not first_op_per_thread:
+            return res
+        ref = first_op_per_thread.pop()
+        candidates: List[Call] = [ref]
+        while first_op_per_thread:
+            op = first_op_per_thread.pop()
+            if op.start >= ref.end:
+                # if op starts after ref ends, then we cannot call op before ref, as that would violate the linearizability
+                continue
+            elif op.end <= ref.end:
+                ref = op
+                candidates.append(op)
+                # we have to recheck all exisiting candidates, as they might be invalidated by the new ref
+                for c in tuple(candidates):
+                    if c.start >= ref.end:
+                        candidates.remove(c)
+            else:
+                # other 2 cases are when op starts before ref ends, and when op ends after ref ends
+                candidates.append(op)
+
+        # now we just pop a candidate an proceed by recursion
+        # print(f'candidates: {candidates}')
+        for c in candidates:
+            # print(f'candidate: {c}')
+
+            new_state = state.copy()
+            optional_state = c.exec(new_state)
+            if optional_state is not None:
+                new_state, _ = optional_state
+            else:
+                continue
+
+            threads_copy = copy.deepcopy(threads)
+
+            threads_copy[c.threadno].pop(0)
+            sol = helper(threads_copy, new_state)
+            if sol is not None:
+                # since sol is a list of solutions, we need to add the current candidate to all of them
+                # two cases:
+                # 1. sol is empty, then we just add the candidate
+                # 2. sol is not empty, then we add the candidate to all of them
+                if sol == []:
+                    res.append([c])
+                else:
+                    for s in sol:
+                        s.insert(0, c)
+                    res.extend(sol)
+
+        if not res:
+            return None
+        return res
+
+    # sort threads by the start time of the first operation
+    for t in threads.values():
+        t.sort(key=lambda x: x.start)
+    ret = helper(threads, state)
+    if ret is None:
+        return ret
+    for i in range(len(ret)):
+        for j in range(len(ret[i])):
+            ret[i][j].order = j + 1
+
+    return ret
+
+
+def make_intervals(sort_by_var: Dict[int, List[Call]]):
+    intervals: Dict[int, I] = {}
+    for var, var_class in sort_by_var.items():
+        i1 = min(c.end for c in var_class)
+        i2 = max(c.start for c in var_class)
+        if i1 < i2:
+            intervals[var] = I(i1, i2)
+        else:
+            intervals[var] = I(i2, i1, True)
+    return intervals
+
+
+def list_cycles(graph: Dict[int, List[int]]):
+    cycles: List[List[int]] = []
+    for var, neighbors in graph.items():
+        for neighbor in neighbors:
+            if neighbor in graph:
+                for neighbor_neighbor in graph[neighbor]:
+                    if neighbor_neighbor == var:
+                        cycles.append([var, neighbor])
+    return cycles
+
+
+def make_blocks(sort_by_var: Dict[int, List[Call]], intervals: Dict[int, I], true_cas_var_groups: List[List[int]]):
+
+    # Step 0: Initialize
+    # Step 0.1: Merge true cases
+    merged_intervals: Dict[Tuple[int] | int, I] = copy.deepcopy(intervals)  # type: ignore
+
+    for true_cas_group in true_cas_var_groups:
+        joined_ops = {true_cas_group[0]: [op for var in true_cas_group for op in sort_by_var[var]]}
+        intervals = make_intervals(joined_ops)
+        merged_intervals[tuple(true_cas_group)] = intervals[true_cas_group[0]]
+        for var in true_cas_group:
+            del merged_intervals[var]
+
+    blocks: List[List[Tuple[int] | int]] = []
+    forward_intervals: Dict[Tuple[int] | int, I] = {var: interval for var,
+                                                    interval in merged_intervals.items() if not interval.reversed}
+    reverse_intervals: Dict[Tuple[int] | int, I] = {
+        var: interval for var, interval in merged_intervals.items() if interval.reversed}
+    # print(forward_intervals)
+    # print(reverse_intervals)
+    # Step 1: Skeleton. All forward intervals are in different blocks
+    for forward_var in forward_intervals:
+        blocks.append([forward_var])
+
+    # Step 2.1: Reversed intervals that contain a forward interval get added to the block and get marked.
+
+    # 0 = not marked
+    # 1 = marked (cannot have a block of its own)
+    isMarked: Dict[I, bool] = {interval: False for interval in reverse_intervals.values()}
+    for var, reverse_interval in reverse_intervals.items():
+        for forward_block in blocks:
+            forward_interval = merged_intervals[forward_block[0]]
+            if forward_interval.isContainedIn(reverse_interval):
+                forward_block.append(var)
+                isMarked[reverse_interval] = True
+
+    # Step 2.2: Clique problem in P time, no problemo
+    rev_intervals_map = {interval: var for var, interval in reverse_intervals.items()}
+    new_blocks: List[List[Tuple[int] | int]] = []
+    for interval_i in sorted(isMarked.copy(), key=lambda x: x.end):
+        intersection_vars: List[Tuple[int] | int] = [rev_intervals_map[interval_i]]
+        for interval_j in sorted(isMarked.copy(), key=lambda x: x.end):
+            if interval_i == interval_j:
+                continue
+            if interval_j.start > interval_i.end:
+                break
+            if interval_i.isIntersecting(interval_j):
+                intersection = interval_i.intersection(interval_j)
+                for forward_interval in forward_intervals.values():
+                    if intersection.isContainedIn(forward_interval):
+                        break
+                else:
+                    intersection_vars.append(rev_intervals_map[interval_j])
+
+        if not all(isMarked[merged_intervals[v]] for v in intersection_vars):
+            new_blocks.append(intersection_vars)
+
+        for v in intersection_vars:
+            isMarked[merged_intervals[v]] = True
+
+        del isMarked[interval_i]
+
+    blocks += new_blocks
+
+    blocks.sort(key=lambda x: min(merged_intervals[v].end for v in x))
+    return blocks
+
+
+def io_check(intervals: Dict[int, I]):
+    for var in intervals:
+        same_var_interval = intervals[var]
+        last_call = same_var_interval.start if same_var_interval.reversed else same_var_interval.end
+        first_return = same_var_interval.end if same_var_interval.reversed else same_var_interval.start
+        for i_var, interval in intervals.items():
+            if i_var == var or interval.reversed:
+                continue
+            if first_return < interval.end and last_call > interval.start:
+                return False
+
+    return True
+
+
+def isAny_cas_intersect_write(false_cases: List[CallCAS], writes: Dict[int, CallWrite | CallCAS]):
+    for c in false_cases:
+        for w in writes.values():
+            if I(c.start, c.end).isIntersecting(I(w.start, w.end)):
+                return True
+    return False
+
+
+def isIntervals_strictly_ordered(spec: List[Call]):
+    sort_by_var = defaultdict(list)
+    populate_call_bins(spec, sort_by_var, [], [])
+    intervals = make_intervals(sort_by_var)
+    for var_i, i in intervals.items():
+        for var_j, j in intervals.items():
+            if i.isIntersecting(j) and var_i != var_j:
+                return False
+    return True
+
+
+def basic_true_cas_checks(true_cases: List[CallCAS]):
+    """
+    checks that there are no loops, ex 1 -> 2, 2 -> 1
+    checks that there is only one root, ex 1 -> 2, 1 -> 3 is not allowed
+    """
+
+    if has_loop(true_cases):
+        return False
+
+    if multiple_roots(true_cases):
+        return False
+
+    return True
+
+
+def has_loop(true_cases: List[CallCAS]):
+    graph = {}
+    for c in true_cases:
+        if c.compare not in graph:
+            graph[c.compare] = []
+        graph[c.compare].append(c.swap)
+
+    def dfs(node, visited):
+        if node in visited:
+            return True
+        visited.add(node)
+        if node not in graph:
+            return False
+        for child in graph[node]:
+            if dfs(child, visited):
+                return True
+        return False
+
+    for node in graph:
+        if dfs(node, set()):
+            return True
+    return False
+
+
+def multiple_roots(true_cases: List[CallCAS]):
+    # If there is a node 3 -> 2, no other node can point from 3
+    origins = {c.compare for c in true_cases}
+    return len(origins) != len(true_cases)
+
+
+def topological_true_cas_sort(true_cases: List[CallCAS]):
+    """
+    sort the true cas calls in topological order
+    nodes can only have one child, so
+    1 -> 2, 1 -> 3 is not allowed
+
+    e.g.
+    2 -> 3, 1 -> 2, 3 -> 4 => [1, 2, 3, 4]
+    """
+    graph: Dict[int, int] = {}
+    for c in true_cases:
+        graph[c.compare] = c.swap
+
+    var_order: List[int] = []
+    visited = set()
+
+    def dfs(node):
+        if node in visited:
+            return
+        visited.add(node)
+        if node in graph:
+            dfs(graph[node])
+        var_order.append(node)
+
+    for node in graph:
+        dfs(node)
+
+    indexed_var_order = {var: i for i, var in enumerate(reversed(var_order))}
+    true_cases.sort(key=lambda c: indexed_var_order[c.compare])
+
+
+def make_true_cas_var_groups(true_cases: List[CallCAS]):
+    true_cas_var_groups: List[List[int]] = []
+    for true_cas in true_cases:
+        for group in true_cas_var_groups:
+            if true_cas.compare == group[-1]:
+                group.append(true_cas.swap)
+                break
+        else:
+            true_cas_var_groups.append([true_cas.compare, true_cas.swap])
+    return true_cas_var_groups
+
+
+def get_false_cas_resolvers(
+        sort_by_var: Dict[int, List[Call]],
+        false_cases: List[CallCAS],
+        blocks: List[List[Tuple[int] | int]],
+        writes: Dict[int, CallWrite | CallCAS],
+        intervals: Dict[int, I]):
+
+    false_cases.sort(key=lambda x: x.end)
+    false_cas_var_resolver: Dict[CallCAS, Set[int]] = {}
+    for false_cas in false_cases:
+        available_writes: List[int] = []
+        block_i = 0
+        while block_i < len(blocks):
+            merged_block = blocks[block_i]
+            block = _expand_list(merged_block)
+
+            if min((min(c.end for c in sort_by_var[var]) for var in block)) < false_cas.start:
+                available_writes.clear()
+
+            writes_in_block = {var for var in block if writes[var].start < false_cas.end}
+            true_cas_tuples = [t for t in merged_block if isinstance(t, tuple)]
+
+            for true_cas in true_cas_tuples:
+                cutoff_var = max(
+                    (var for var in true_cas if min(c.end for c in sort_by_var[var]) < false_cas.start),
+                    key=lambda x: true_cas.index(x), default=-1)
+                if cutoff_var == -1:
+                    continue
+
+                cutoff_i = true_cas.index(cutoff_var)
+                for var in true_cas[:cutoff_i]:
+                    writes_in_block.discard(var)
+
+            available_writes.extend(writes_in_block)
+
+            # if len(writes_in_block) == 0:
+            #     break
+
+            line = 0
+            for var in writes_in_block:
+                interval = intervals[var]
+                if interval.reversed:
+                    line = max(line, interval.start)
+                else:
+                    line = max(line, interval.end)
+
+            if false_cas.end > line:
+                block_i += 1
+            else:
+                break
+
+        # if the false cas is fully contained in a forward interval then the only available write is of that interval
+        for var in available_writes.copy():
+            interval = intervals[var]
+            if interval.reversed:
+                continue
+            if I(false_cas.start, false_cas.end).isContainedIn(interval):
+                available_writes = [var]
+                break
+
+        false_cas_var_resolver[false_cas] = set(available_writes)
+        false_cas_var_resolver[false_cas].discard(false_cas.compare)
+
+    visited: Dict[int, I] = {}
+    for false_cas in false_cases:
+        if false_cas.compare not in visited and false_cas.compare in writes:
+            if false_cas.start > writes[false_cas.compare].end:
+                visited[false_cas.compare] = I(false_cas.end, math.inf)
+
+    for false_cas in false_cases:
+        for var in false_cas_var_resolver[false_cas].copy():
+            if var in visited:
+                if I(false_cas.start, false_cas.end).isContainedIn(visited[var]):
+                    false_cas_var_resolver[false_cas].remove(var)
+    return false_cas_var_resolver
+
+
+def false_cas_group_check(false_cas_var_resolver: Dict[CallCAS, Set[int]], writes: Dict[int, CallWrite | CallCAS]):
+    writes_ret = [0] + sorted([w.end for w in writes.values()]) + [math.inf]
+    writes_ret_i = 0
+    latest_write_ret: List[int] = []
+    false_cases = list(false_cas_var_resolver.keys())
+    false_cases.sort(key=lambda x: x.end)
+    for false_cas in false_cases:
+        while True:
+            if I(
+                false_cas.start, false_cas.end).isContainedIn(
+                I(writes_ret[writes_ret_i],
+                  writes_ret[writes_ret_i + 1])):
+                latest_write_ret.append(writes_ret_i)
+                break
+            else:
+                writes_ret_i += 1
+
+    false_cas_blocks_i: Dict[int, List[CallCAS]] = defaultdict(list)
+    for false_cas_i in range(len(false_cases)):
+        false_cas_blocks_i[latest_write_ret[false_cas_i]].append(false_cases[false_cas_i])
+
+    false_cas_blocks = list(false_cas_blocks_i.values())
+    for false_cas_block in false_cas_blocks:
+        false_cas_block_vars = set.intersection(*[false_cas_var_resolver[false_cas] for false_cas in false_cas_block])
+        if len(false_cas_block_vars) == 0:
+            return False
+    return True
+
+
+def _expand_list(l: List[Tuple[int] | int]) -> List[int]:
+    ret = []
+    for t in l:
+        if isinstance(t, tuple):
+            ret.extend(_expand_list(list(t)))
+        else:
+            ret.append(t)
+    return ret
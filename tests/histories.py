@@ -0,0 +1,122 @@
+"""
+small seeded random histories shared by the agreement tests
+"""
+from typing import Dict, List, Iterator, Set, Tuple
+from classes import *
+from generate import random_specs
+import numpy as np
+import pickle
+import random
+import os
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def register_specs(seed: int, count: int, m: int = 6, ops: List[str] = ["io"]) -> List[List[Call]]:
+    """
+    count register histories of m calls on 3 threads, a third of them linearizable with only reads and writes
+    """
+    rng = np.random.default_rng(seed)
+    return random_specs(rng, count, n=3, m=m, p=3, ops=ops, min_offset=1, max_offset=5,
+                        min_duration=1, max_duration=10)
+
+
+def queue_spec(rng: random.Random, n: int, m: int, p: int) -> List[Call]:
+    """
+    m random enqueues and dequeues of p values on n threads
+    """
+    ends = {}
+    spec: List[Call] = []
+    for _ in range(m):
+        t = rng.randint(1, n)
+        start = ends.get(t, 0) + rng.randint(1, 5) + rng.random()
+        end = start + rng.randint(1, 10) + rng.random()
+        ends[t] = end
+        call = CallEnq if rng.random() < 0.5 else CallDeq
+        spec.append(call(t, rng.randrange(p), start, end))
+    return spec
+
+
+class _Unpickler(pickle.Unpickler):
+    # testio.pkl was written from a script, so its classes are pickled as __main__ ones
+    def find_class(self, module: str, name: str):
+        if module == "__main__":
+            module = "classes"
+        return super().find_class(module, name)
+
+
+def iter_testio(limit: int) -> Iterator[Tuple[List[Call], bool]]:
+    """
+    the first limit labelled register histories of tests/testio.pkl
+    """
+    with open(os.path.join(TESTS_DIR, "testio.pkl"), "rb") as f:
+        for _ in range(limit):
+            try:
+                # one unpickler per record, the memo of a record is not valid for the next one
+                yield _Unpickler(f).load()
+            except EOFError:
+                return
+
+
+def simulated_spec(rng: random.Random, model: str, n: int, m: int, corrupt: bool) -> List[Call]:
+    """
+    m calls on n threads that run an actual object, each call placed around its linearization point,
+    so the history is linearizable unless corrupt changes the result or the argument of one call
+    """
+    if model not in ("register", "queue", "stack", "set", "map", "counter"):
+        raise NotImplementedError(f"Model {model} not implemented")
+
+    value = 0
+    items: List[int] = []
+    members: Set[int] = set()
+    entries: Dict[int, int] = {}
+    bad = rng.randrange(m) if corrupt else -1
+    ends = {t: -10.0 for t in range(n)}
+    spec: List[Call] = []
+    next_value = 1
+    for step in range(m):
+        # the corrupted call shows a value the object never had
+        wrong = int(step == bad)
+        t = rng.randrange(n)
+        point = max(float(step), ends[t] + 1.2)
+        start, end = point - rng.random() * 1.1, point + rng.random() * 1.1
+        c: Call
+        if model == "register" and value and rng.random() < 0.5:
+            c = CallRead(t, value + wrong, start, end)
+        elif model == "register":
+            c = CallWrite(t, next_value + wrong, start, end)
+            value = next_value
+            next_value += 1
+        elif model == "queue" and items and rng.random() < 0.5:
+            c = CallDeq(t, items.pop(0) + wrong, start, end)
+        elif model == "stack" and items and rng.random() < 0.5:
+            c = CallPop(t, items.pop() + wrong, start, end)
+        elif model in ("queue", "stack"):
+            c = (CallEnq if model == "queue" else CallPush)(t, next_value + wrong, start, end)
+            items.append(next_value)
+            next_value += 1
+        elif model == "set":
+            x, r = rng.randrange(3), rng.random()
+            if r < 0.4:
+                c = CallAdd(t, x, (x not in members) != wrong, start, end)
+                members.add(x)
+            elif r < 0.7:
+                c = CallRemove(t, x, (x in members) != wrong, start, end)
+                members.discard(x)
+            else:
+                c = CallContains(t, x, (x in members) != wrong, start, end)
+        elif model == "map":
+            k = rng.randrange(3)
+            if rng.random() < 0.5:
+                v = rng.randrange(1, 4)
+                c = CallPut(t, k, v + 3 * wrong, start, end)
+                entries[k] = v
+            else:
+                c = CallGet(t, k, entries.get(k, 0) + 4 if wrong else entries.get(k), start, end)
+        else:
+            delta = rng.choice([0, 0, 1, 2])
+            c = CallFetchAdd(t, delta, value + wrong, start, end)
+            value += delta
+        spec.append(c)
+        ends[t] = end
+    return spec
@@ -0,0 +1,27 @@
+import random
+from classes import *
+from batch import verify_tests, check_verdict, io_verdict
+from generate import is_linearizable
+from utils import generate_random_spec, isAny_fcas_intersect_write_comb
+
+
+def labelled_tests():
+    random.seed(1)
+    tests = []
+    while len(tests) < 200:
+        spec = generate_random_spec(3, 8, 4, ["io", "cas"], 1, 5, 1, 10)
+        if not isAny_fcas_intersect_write_comb(spec):
+            tests.append((spec, is_linearizable(spec)))
+    # a few wrong labels, to be reported
+    for i in range(0, 200, 40):
+        tests[i] = (tests[i][0], not tests[i][1])
+    return tests
+
+
+def test_serial_and_pool_agree():
+    tests = labelled_tests()
+    serial = verify_tests(tests, io_verdict, processes=1)
+    assert serial == [0, 40, 80, 120, 160]
+    assert all(c.order is None for spec, _ in tests for c in spec)
+    assert verify_tests(tests, io_verdict, processes=2, chunksize=16) == serial
+    assert verify_tests(tests, check_verdict, processes=2, chunksize=16) == serial
@@ -0,0 +1,18 @@
+import json
+from bench import main, compare
+
+
+def test_compare_reports_regressions():
+    params = {"n": 3, "m": 8, "p": 4, "ops": ["io", "cas"], "min_offset": 1, "max_offset": 5,
+              "min_duration": 1, "max_duration": 10}
+    base = [{"params": params, "engine": "check", "ops_per_sec": 100.0, "p99_ms": 1.0}]
+    assert compare([{**base[0], "ops_per_sec": 95.0}], base, 0.2) == []
+    assert len(compare([{**base[0], "ops_per_sec": 50.0}], base, 0.2)) == 1
+
+
+def test_main_writes_results(tmp_path):
+    out = tmp_path / "bench.json"
+    assert main(["--m", "5", "--cases", "5", "--engines", "linearize_io", "check", "--out", str(out)]) == 0
+    results = json.loads(out.read_text())["results"]
+    assert [res["engine"] for res in results] == ["linearize_io", "check"]
+    assert results[0]["linearizable"] == results[1]["linearizable"]
@@ -0,0 +1,38 @@
+import threading
+import pytest
+from classes import *
+from checker import check, Budget
+from utils import linearize_generic
+
+
+def hard_history():
+    # 30 concurrent enqueues and a dequeue of a value that was never enqueued, every order is tried before failing
+    spec = [CallEnq(t, 100 * t + k, 10 * k, 10 * k + 9) for t in range(10) for k in range(3)]
+    return spec + [CallDeq(99, -1, 100, 101)]
+
+
+def test_node_budget_gives_unknown():
+    res = check(hard_history(), budget=Budget(max_nodes=1000))
+    assert res.linearizable is None and res.engine == "linearize_wgl"
+    assert res.stats.nodes == 1000
+
+
+def test_deadline_and_cancel_give_unknown():
+    assert check(hard_history(), budget=Budget(seconds=0)).linearizable is None
+    cancel = threading.Event()
+    cancel.set()
+    assert check(hard_history(), budget=Budget(cancel=cancel)).linearizable is None
+
+
+def test_verdict_within_budget():
+    spec = [CallEnq(1, 1, 0, 2), CallEnq(2, 2, 1, 3), CallDeq(1, 2, 4, 5)]
+    res = check(spec, budget=Budget(seconds=10, max_nodes=100))
+    assert res.linearizable is True and res.stats.nodes > 0
+
+
+def test_generic_search_is_cancelled():
+    budget = Budget(max_nodes=500)
+    stats = SearchStats()
+    with pytest.raises(SearchCancelled):
+        linearize_generic(hard_history(), StateQueue(), "decide", stats, budget.should_stop(stats))
+    assert stats.nodes == 500
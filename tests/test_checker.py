@@ -0,0 +1,21 @@
+from classes import *
+from checker import check
+from linearize_io import is_valid_order
+from linearize_wgl import linearize_wgl
+
+
+def touching_history():
+    # W0 returns when W2 starts, so W2 comes after it and R0 reads an overwritten value
+    return [CallWrite(1, 0, 3, 4), CallWrite(2, 2, 4, 8), CallRead(1, 0, 8, 10), CallRead(2, 2, 10, 14)]
+
+
+def test_touching_calls_are_ordered():
+    assert linearize_wgl(touching_history(), StateIO()) is None
+    res = check(touching_history())
+    assert res.engine == "linearize_wgl" and res.linearizable is False
+
+
+def test_is_valid_order_orders_touching_calls():
+    w0, w2, r0, r2 = touching_history()
+    assert not is_valid_order([w2, w0, r0, r2], StateIO())
+    assert is_valid_order([w0, w2, r2], StateIO())
@@ -0,0 +1,47 @@
+import os
+import pytest
+from classes import *
+from corpus import save_corpus, Corpus, corpus_to_pickle
+from utils import iter_test
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("tests")
+    return tmp_path
+
+
+def sample():
+    return [
+        ([CallWrite(1, 1, 0, 1), CallCAS(2, True, 1, 2, 0.5, 3), CallRead(1, 2, 4, 5)], True),
+        ([], False),
+        ([CallEnq(1, 7, 0, 1), CallDeq(2, 7, 2, 3), CallPut(1, 3, 4, 0, 1), CallGet(2, 3, 4, 2, 3),
+          CallFetchAdd(1, -5, 2 ** 62, 0, 1), CallAdd(2, 1, False, 1, 2)], False),
+    ]
+
+
+def test_round_trip(workdir):
+    save_corpus(sample(), "sample.corpus")
+    corpus = Corpus("sample.corpus")
+    assert len(corpus) == 3
+    for (spec, res), (loaded, loaded_res) in zip(sample(), corpus):
+        assert [encode_call(c) for c in loaded] == [encode_call(c) for c in spec] and loaded_res == res
+    assert [type(c) for c in corpus[-1][0]] == [type(c) for c in sample()[-1][0]]
+
+    corpus_to_pickle("sample.corpus", "sample.pkl")
+    assert [[encode_call(c) for c in spec] for spec, _ in iter_test("sample.pkl")] == \
+        [[encode_call(c) for c in spec] for spec, _ in sample()]
+
+
+def test_unsupported_argument_leaves_nothing(workdir):
+    with pytest.raises(ValueError):
+        save_corpus(sample() + [([CallWrite(1, "a", 0, 1)], True)], "bad.corpus")
+    assert os.listdir("tests") == []
+
+    # an existing corpus is kept
+    save_corpus(sample(), "sample.corpus")
+    with pytest.raises(ValueError):
+        save_corpus([([CallWrite(1, 2 ** 64, 0, 1)], True)], "sample.corpus")
+    assert len(Corpus("sample.corpus")) == 3
+    assert os.listdir("tests") == ["sample.corpus"]
@@ -0,0 +1,29 @@
+import sys
+from classes import *
+from linearize_wgl import linearize_wgl
+from utils import linearize_generic, iter_linearizations
+
+# well over the recursion limit
+DEPTH = 5 * sys.getrecursionlimit()
+
+
+def sequential_writes():
+    spec = [CallWrite(k % 4, k, k, k + 0.9) for k in range(DEPTH)]
+    return spec + [CallRead(5, DEPTH - 1, DEPTH, DEPTH + 1)]
+
+
+def sequential_queue():
+    spec = [CallEnq(k % 4, k, k, k + 0.9) for k in range(DEPTH // 2)]
+    return spec + [CallDeq(4 + k % 4, k, DEPTH // 2 + k, DEPTH // 2 + k + 0.5) for k in range(DEPTH // 2)]
+
+
+def test_generic_search_is_not_recursive():
+    assert linearize_generic(sequential_writes(), StateIO(), "decide")
+    assert len(next(iter_linearizations(sequential_queue(), StateQueue()))) == DEPTH
+
+
+def test_wgl_search_is_not_recursive():
+    spec = sequential_writes()
+    assert linearize_wgl(spec, StateIO()) is not None
+    assert [c.order for c in spec] == list(range(1, DEPTH + 2))
+    assert linearize_wgl(sequential_queue(), StateQueue()) is not None
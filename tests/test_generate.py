@@ -0,0 +1,22 @@
+import numpy as np
+from classes import *
+from generate import random_specs, iter_generated
+
+
+def encoded(tests):
+    return [([encode_call(c) for c in spec], sol) for spec, sol in tests]
+
+
+def test_random_specs_depend_only_on_the_seed():
+    params = dict(n=3, m=8, p=4, ops=["io", "cas"], min_offset=1, max_offset=5, min_duration=1, max_duration=10)
+    a = random_specs(np.random.default_rng(7), 50, **params)
+    b = random_specs(np.random.default_rng(7), 50, **params)
+    assert encoded((spec, None) for spec in a) == encoded((spec, None) for spec in b)
+
+
+def test_generated_tests_do_not_depend_on_the_processes():
+    kwargs = dict(total=40, success_percentage=0.5, batch_size=64, seed=3)
+    serial = encoded(iter_generated(processes=1, **kwargs))
+    assert serial == encoded(iter_generated(processes=1, **kwargs))
+    assert serial == encoded(iter_generated(processes=2, **kwargs))
+    assert sum(sol for _, sol in serial) == 20
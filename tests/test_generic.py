@@ -0,0 +1,39 @@
+import copy
+import random
+from classes import *
+from utils import linearize_generic
+from baseline import linearize_generic as baseline_generic
+from histories import register_specs, queue_spec
+
+
+def test_empty_history():
+    assert linearize_generic([], StateIO()) == []
+    assert linearize_generic([], StateIO(), mode="decide") is True
+
+
+def keys(linearizations):
+    # the baseline linearizes deep copies of the calls, so they are compared by thread and start
+    return sorted(tuple((c.threadno, c.start) for c in l) for l in linearizations or [])
+
+
+def check_same_linearizations(spec, state):
+    expected = baseline_generic(copy.deepcopy(spec), state.copy())
+    ret = linearize_generic(spec, state.copy())
+    assert (ret is None) == (expected is None)
+    assert keys(ret) == keys(expected)
+    assert linearize_generic(spec, state.copy(), mode="decide") == (expected is not None)
+    witness = linearize_generic(spec, state.copy(), mode="witness")
+    assert (witness is None) == (expected is None)
+    if witness is not None:
+        assert keys([witness])[0] in keys(expected)
+
+
+def test_register_linearizations_match_baseline():
+    for spec in register_specs(seed=3, count=200) + register_specs(seed=4, count=200, ops=["io", "cas"]):
+        check_same_linearizations(spec, StateIO())
+
+
+def test_queue_linearizations_match_baseline():
+    rng = random.Random(3)
+    for _ in range(200):
+        check_same_linearizations(queue_spec(rng, n=3, m=rng.randint(2, 7), p=3), StateQueue())
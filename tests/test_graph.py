@@ -0,0 +1,15 @@
+from graph import find_cycles, get_non_cycle_edges
+
+
+def test_find_cycles_on_a_square():
+    # C4 is not chordal, it has no clique bigger than 2 but it is a cycle
+    square = {0: [1, 3], 1: [0, 2], 2: [1, 3], 3: [2, 0]}
+    assert find_cycles(square) == [[0, 1, 2, 3]]
+
+
+
+def test_non_cycle_edges():
+    graph = {1: [1, 2, 3, 4], 2: [1, 2, 4], 3: [1, 3, 7], 4: [2, 4, 5, 6, 1], 5: [4, 5, 6], 6: [4, 5, 6], 7: [3, 7]}
+    cycles = find_cycles(graph)
+    assert [1, 2, 4] in cycles and [4, 5, 6] in cycles
+    assert get_non_cycle_edges(graph, cycles) == [[1, 3], [3, 7]]
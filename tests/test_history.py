@@ -0,0 +1,22 @@
+from classes import *
+
+
+def test_history_keeps_the_calls():
+    w = CallWrite(1, "a", 0, 1)
+    h = History([w])
+    h.calls.append(CallRead(2, 2 ** 70, 2, 3))
+    h[0].order = 1
+    assert len(h) == 2 and h[0] is w and w.order == 1
+    assert [c.arg for c in h] == ["a", 2 ** 70]
+    assert h == History([w, CallRead(2, 2 ** 70, 2, 3)])
+
+
+def test_hash_follows_the_fields():
+    c = CallWrite(1, 1, 0, 1)
+    d = CallWrite(1, 1, 0, 1)
+    assert hash(c) == hash(d) and c == d
+    c.start = 0.5
+    d.start = 0.5
+    c.order = d.order = 2
+    assert hash(c) == hash(d) and c == d
+    assert len({c, d}) == 1
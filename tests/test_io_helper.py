@@ -0,0 +1,168 @@
+import math
+import random
+from collections import defaultdict
+from classes import *
+import linearize_io_helper as hp
+import utils
+from interval_index import RangeIndex, MaxIndex
+from generate import random_specs
+import numpy as np
+import baseline
+from histories import register_specs
+
+
+def random_intervals(rng, k):
+    # as in make_intervals, only a reversed interval can be empty
+    intervals = {}
+    for var in range(k):
+        start = rng.randint(0, 30)
+        reversed = rng.random() < 0.6
+        intervals[var] = I(start, start + rng.randint(0 if reversed else 1, 12), reversed)
+    return intervals
+
+
+def test_make_blocks_matches_baseline():
+    rng = random.Random(11)
+    for _ in range(2000):
+        intervals = random_intervals(rng, rng.randint(1, 14))
+        assert hp.make_blocks({}, intervals, []) == baseline.make_blocks({}, intervals, [])
+
+
+def prepared(spec):
+    """
+    the arguments of the helper phases of linearize_io, or None if the history fails before make_blocks
+    """
+    sort_by_var = defaultdict(list)
+    true_cases, false_cases = [], []
+    hp.populate_call_bins(spec, sort_by_var, true_cases, false_cases)
+    writes = hp.basic_io_checks(sort_by_var)
+    if writes is None:
+        return None
+    true_cas_var_groups = hp.analyze_true_cas(true_cases)
+    if true_cas_var_groups is None:
+        return None
+    return sort_by_var, false_cases, writes, hp.make_intervals(sort_by_var), true_cas_var_groups
+
+
+def test_make_blocks_with_true_cas_matches_baseline():
+    checked = 0
+    for spec in register_specs(seed=11, count=800, m=10, ops=["io", "cas"]):
+        args = prepared(spec)
+        if args is None:
+            continue
+        sort_by_var, _, _, intervals, true_cas_var_groups = args
+        expected = baseline.make_blocks(sort_by_var, intervals, true_cas_var_groups)
+        assert hp.make_blocks(sort_by_var, intervals, true_cas_var_groups) == expected
+        checked += 1
+    assert checked > 100
+
+
+def test_range_index_matches_brute_force():
+    rng = random.Random(11)
+    for _ in range(300):
+        values = [rng.randint(0, 20) for _ in range(rng.randint(0, 20))]
+        index = RangeIndex(values)
+        n = len(values)
+        for _ in range(10):
+            lo, hi = sorted((rng.randint(0, n), rng.randint(0, n)))
+            bound = rng.randint(0, 20)
+            assert index.report_below(lo, hi, bound) == [p for p in range(lo, hi) if values[p] < bound]
+            assert index.report_below(lo, hi, bound, strict=False) == [p for p in range(lo, hi) if values[p] <= bound]
+            assert index.last_below(hi, bound) == max((p for p in range(hi) if values[p] < bound), default=-1)
+            assert index.first_above(lo, bound) == min((p for p in range(lo, n) if values[p] > bound), default=n)
+
+
+def test_io_check_matches_baseline():
+    rng = random.Random(12)
+    for _ in range(3000):
+        intervals = random_intervals(rng, rng.randint(0, 10))
+        assert hp.io_check(intervals) == baseline.io_check(intervals)
+
+
+def test_cas_intersect_write_matches_baseline():
+    rng = random.Random(12)
+    for _ in range(3000):
+        starts = [rng.randint(0, 20) for _ in range(rng.randint(0, 5))]
+        false_cases = [CallCAS(1, False, 1, 2, s, s + rng.randint(0, 5)) for s in starts]
+        starts = [rng.randint(0, 20) for _ in range(rng.randint(0, 5))]
+        writes = {var: CallWrite(2, var, s, s + rng.randint(0, 5)) for var, s in enumerate(starts)}
+        assert hp.isAny_cas_intersect_write(false_cases, writes) == baseline.isAny_cas_intersect_write(false_cases, writes)
+
+
+def test_strictly_ordered_matches_baseline():
+    for spec in register_specs(seed=12, count=1000, m=5):
+        assert utils.isIntervals_strictly_ordered(spec) == baseline.isIntervals_strictly_ordered(spec)
+
+
+def random_true_cases(rng):
+    p = rng.randint(2, 10)
+    true_cases = []
+    for _ in range(rng.randint(0, 8)):
+        compare, swap = rng.sample(range(p + 1), 2)
+        true_cases.append(CallCAS(1, True, compare, swap, 0, 1))
+    return true_cases
+
+
+def test_analyze_true_cas_matches_baseline():
+    rng = random.Random(13)
+    for _ in range(5000):
+        true_cases = random_true_cases(rng)
+        expected_order = list(true_cases)
+        valid = baseline.basic_true_cas_checks(true_cases)
+        assert hp.basic_true_cas_checks(true_cases) == valid
+
+        analyzed = list(true_cases)
+        groups = hp.analyze_true_cas(analyzed)
+        assert (groups is not None) == valid
+        if not valid:
+            continue
+        baseline.topological_true_cas_sort(expected_order)
+        assert [id(c) for c in analyzed] == [id(c) for c in expected_order]
+        assert groups == baseline.make_true_cas_var_groups(expected_order)
+
+
+def test_long_true_cas_chain():
+    rng = random.Random(13)
+    chain = [CallCAS(1, True, i, i + 1, 0, 1) for i in range(5000)]
+    rng.shuffle(chain)
+    assert hp.analyze_true_cas(chain) == [list(range(5001))]
+    assert [c.compare for c in chain] == list(range(5000))
+    assert hp.analyze_true_cas(chain + [CallCAS(1, True, 5000, 0, 0, 1)]) is None
+
+
+def test_false_cas_resolvers_match_baseline():
+    rng = np.random.default_rng(15)
+    checked = 0
+    for _ in range(40):
+        specs = random_specs(rng, 50, n=int(rng.integers(2, 7)), m=int(rng.integers(4, 30)), p=int(rng.integers(2, 12)),
+                             ops=["io", "cas"], min_offset=0, max_offset=int(rng.integers(1, 7)),
+                             min_duration=1, max_duration=int(rng.integers(1, 11)))
+        for spec in specs:
+            args = prepared(spec)
+            if args is None:
+                continue
+            sort_by_var, false_cases, writes, intervals, true_cas_var_groups = args
+            blocks = hp.make_blocks(sort_by_var, intervals, true_cas_var_groups)
+            expected = baseline.get_false_cas_resolvers(sort_by_var, list(false_cases), blocks, writes, intervals)
+            resolvers = hp.get_false_cas_resolvers(sort_by_var, list(false_cases), blocks, writes, intervals)
+            assert list(resolvers) == list(expected)
+            assert all(resolvers[c] == expected[c] for c in expected)
+            # the group check assumes that no false cas intersects a write
+            if not hp.isAny_cas_intersect_write(false_cases, writes):
+                assert hp.false_cas_group_check(resolvers, writes) == baseline.false_cas_group_check(expected, writes)
+            checked += len(false_cases)
+    assert checked > 500
+
+
+def test_max_index_matches_brute_force():
+    rng = random.Random(15)
+    for _ in range(300):
+        n = rng.randint(1, 20)
+        index = MaxIndex(n)
+        values = [-math.inf] * n
+        for _ in range(20):
+            pos, value = rng.randrange(n), rng.choice([-math.inf, rng.randint(0, 20)])
+            index.update(pos, value)
+            values[pos] = value
+            bound = rng.randint(0, 20)
+            assert index.first_at_least(bound) == min((p for p in range(n) if values[p] >= bound), default=n)
@@ -0,0 +1,33 @@
+import copy
+from classes import *
+from checker import isIO_applicable
+from linearize_io import linearize_io, is_valid_order, run_test
+from baseline import linearize_generic as baseline_generic
+from histories import register_specs, iter_testio
+
+
+def check_agreement(spec):
+    expected = baseline_generic(copy.deepcopy(spec), StateIO()) is not None
+    res = linearize_io(spec)
+    assert res.linearizable == expected
+    assert (res.failed_check is None) == expected
+    if res.order is not None:
+        assert is_valid_order(res.order, StateIO())
+
+
+def test_labelled_histories():
+    testsample = list(iter_testio(1000))
+    for spec, label in testsample:
+        res = linearize_io(copy.deepcopy(spec))
+        assert res.linearizable == label
+    assert run_test(testsample) == []
+
+
+def test_agrees_with_baseline():
+    specs = register_specs(seed=5, count=300) + register_specs(seed=6, count=300, ops=["io", "cas"])
+    checked = 0
+    for spec in specs:
+        if isIO_applicable(spec):
+            check_agreement(spec)
+            checked += 1
+    assert checked > 300
@@ -0,0 +1,18 @@
+from classes import *
+from minimize import minimize
+
+
+def test_false_cas_keeps_a_write():
+    # a lone false cas fails on the empty register, it must not replace the stale read
+    spec = [CallWrite(1, 1, 0, 1), CallCAS(2, False, 5, 6, 2, 3), CallWrite(1, 2, 4, 5), CallRead(2, 1, 6, 7)]
+    assert [str(c) for c in minimize(spec)] == ["write([1])", "write([2])", "read([1])"]
+
+
+def test_failed_add_keeps_an_add():
+    spec = [CallAdd(1, 1, True, 0, 1), CallAdd(2, 1, False, 2, 3), CallContains(1, 1, False, 4, 5)]
+    assert [str(c) for c in minimize(spec)] == ["add([1, True])", "contains([1, False])"]
+
+
+def test_fetch_add_keeps_an_increment():
+    spec = [CallFetchAdd(1, 2, 0, 0, 1), CallFetchAdd(2, 0, 5, 2, 3)]
+    assert [str(c) for c in minimize(spec)] == ["fetch_add([2, 0])", "fetch_add([0, 5])"]
@@ -0,0 +1,73 @@
+import copy
+import random
+from classes import *
+from checker import check, initial_state
+from linearize_io import is_valid_order
+from linearize_wgl import linearize_wgl
+from online import check_online
+from partition import linearize_partitioned
+from utils import iter_linearizations
+from baseline import linearize_generic as baseline_generic
+from histories import simulated_spec
+
+MODELS = ["stack", "set", "map", "counter"]
+
+
+def test_engines_agree_with_baseline():
+    rng = random.Random(20)
+    verdicts = {True: 0, False: 0}
+    for _ in range(1200):
+        model = rng.choice(MODELS)
+        spec = simulated_spec(rng, model, n=rng.randint(2, 4), m=rng.randint(3, 7), corrupt=rng.random() < 0.5)
+        state = initial_state(spec)
+        expected = baseline_generic(copy.deepcopy(spec), state.copy()) is not None
+        verdicts[expected] += 1
+
+        witness = next(iter_linearizations(copy.deepcopy(spec), state.copy()), None)
+        reduced = next(iter_linearizations(copy.deepcopy(spec), state.copy(), reduce=True), None)
+        assert (witness is not None) == (reduced is not None) == expected
+        if reduced is not None:
+            assert is_valid_order(reduced, state)
+        assert (linearize_wgl(copy.deepcopy(spec), state.copy()) is not None) == expected
+        assert (check_online(copy.deepcopy(spec), state.copy()) is None) == expected
+        assert check(copy.deepcopy(spec)).linearizable == expected
+        if model == "map":
+            partitioned = linearize_partitioned(copy.deepcopy(spec), StateMap, key=lambda c: c.key)
+            assert (partitioned is not None) == expected
+    assert min(verdicts.values()) > 300
+
+
+def test_commutes_is_symmetric_and_sound():
+    rng = random.Random(20)
+    for _ in range(500):
+        spec = simulated_spec(rng, rng.choice(MODELS), n=2, m=8, corrupt=rng.random() < 0.5)
+        state = initial_state(spec)
+        # the states reached by the prefixes of a sequential run
+        states = [state.copy()]
+        for c in spec:
+            res = c.exec(state)
+            if res is None:
+                break
+            state = res[0]
+            states.append(state.copy())
+
+        for a in spec:
+            for b in spec:
+                assert a.commutes(b) == b.commutes(a)
+                if not a.commutes(b):
+                    continue
+                for s in states:
+                    assert run(s, a, b) == run(s, b, a)
+
+
+def run(state, *calls):
+    """
+    fingerprint of the state after the calls, or None if one of them fails
+    """
+    state = state.copy()
+    for c in calls:
+        res = c.exec(state)
+        if res is None:
+            return None
+        state = res[0]
+    return state.fingerprint()
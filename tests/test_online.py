@@ -0,0 +1,30 @@
+import random
+from classes import *
+from linearize_wgl import linearize_wgl
+from online import OnlineChecker, check_online
+from utils import generate_random_spec
+
+
+def test_pending_call_may_take_effect():
+    checker = OnlineChecker(StateIO())
+    checker.invoke(CallWrite(1, 1, 0, 0))
+    read = CallRead(2, 1, 1, 2)
+    checker.invoke(read)
+    checker.respond(read)
+    assert checker.finish() and checker.violation is None
+
+
+def test_pending_call_does_not_hide_a_violation():
+    checker = OnlineChecker(StateIO())
+    checker.invoke(CallWrite(1, 1, 0, 0))
+    read = CallRead(2, 2, 1, 2)
+    checker.invoke(read)
+    checker.respond(read)
+    assert not checker.finish() and checker.violation == (2, read)
+
+
+def test_agrees_with_wgl():
+    random.seed(0)
+    for _ in range(300):
+        spec = generate_random_spec(3, 8, 3, ["io", "cas"], 1, 5, 1, 10)
+        assert (check_online(spec, StateIO()) is None) == (linearize_wgl(spec, StateIO()) is not None)
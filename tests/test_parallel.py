@@ -0,0 +1,27 @@
+import copy
+import random
+from classes import *
+from linearize_io import is_valid_order
+from linearize_wgl import linearize_wgl
+from parallel_search import linearize_parallel
+from histories import simulated_spec
+
+
+def check_agreement(model, state, width):
+    rng = random.Random(8)
+    for i in range(20):
+        spec = simulated_spec(rng, model, n=4, m=16, corrupt=i % 2 == 1)
+        expected = linearize_wgl(copy.deepcopy(spec), state.copy()) is not None
+        witness = linearize_parallel(spec, state.copy(), processes=2, width=width)
+        assert (witness is not None) == expected
+        if witness is not None:
+            assert len(witness) == len(spec)
+            assert is_valid_order(witness, state)
+
+
+def test_register_agrees_with_wgl():
+    check_agreement("register", StateIO(), width=2)
+
+
+def test_queue_agrees_with_wgl():
+    check_agreement("queue", StateQueue(), width=4)
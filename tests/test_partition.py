@@ -0,0 +1,34 @@
+import copy
+import random
+from classes import *
+from linearize_io import is_valid_order
+from partition import linearize_partitioned, split_by_key
+from baseline import linearize_generic as baseline_generic
+from histories import queue_spec
+
+
+def two_queues(rng):
+    # the second queue runs on its own threads
+    a = queue_spec(rng, n=3, m=rng.randint(1, 5), p=2)
+    b = queue_spec(rng, n=3, m=rng.randint(1, 5), p=2)
+    for c in b:
+        c.threadno += 3
+    return a, b
+
+
+def test_partitioned_agrees_with_each_object():
+    rng = random.Random(4)
+    for _ in range(300):
+        a, b = two_queues(rng)
+        expected = all(baseline_generic(copy.deepcopy(h), StateQueue()) is not None for h in (a, b))
+        spec = a + b
+        merged = linearize_partitioned(spec, StateQueue, key=lambda c: c.threadno > 3)
+        assert (merged is not None) == expected
+        if merged is None:
+            continue
+        assert sorted(c.order for c in spec) == list(range(1, len(spec) + 1))
+        # the merged order respects the real time order across the two queues
+        assert all(not (x.end <= y.start and x.order > y.order) for x in spec for y in spec)
+        # and linearizes each queue on its own
+        for sub_history in split_by_key(merged, key=lambda c: c.threadno > 3).values():
+            assert is_valid_order(sub_history, StateQueue())
@@ -0,0 +1,34 @@
+import pickle
+from classes import *
+from online import OnlineChecker
+
+
+def test_fingerprint_is_the_content():
+    q = StateQueue()
+    for v in (1, 2, 3):
+        CallEnq(1, v, 0, 1).exec(q)
+    CallDeq(2, 1, 2, 3).exec(q)
+    assert q.fingerprint() == StateQueue([2, 3]).fingerprint() == StateQueue([9, 2, 3], head=1).fingerprint()
+    assert hash(q.fingerprint()) == hash(StateQueue([2, 3]).fingerprint())
+    assert q.fingerprint() != StateQueue([3, 2]).fingerprint()
+
+
+def test_restore_and_pickle():
+    q = StateQueue([1, 2])
+    snapshot = q.snapshot()
+    CallEnq(1, 3, 0, 1).exec(q)
+    q.restore(snapshot)
+    assert q.fingerprint() == StateQueue([1, 2]).fingerprint()
+    assert pickle.loads(pickle.dumps(q)).fingerprint() == q.fingerprint()
+
+
+def test_copies_drop_the_dequeued_values():
+    checker = OnlineChecker(StateQueue())
+    t = 0
+    for k in range(2000):
+        for c in (CallEnq(1, k, t, t + 1), CallDeq(2, k, t + 2, t + 3)):
+            checker.invoke(c)
+            checker.respond(c)
+        t += 4
+    assert checker.finish()
+    assert all(len(state.intern) <= 1 for state in checker.configs.values())
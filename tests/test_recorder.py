@@ -0,0 +1,71 @@
+import asyncio
+import queue
+import threading
+from classes import *
+from checker import check
+from recorder import Recorder, AtomicCell, RecordedRegister, RecordedQueue, AsyncRecordedQueue
+
+
+def run_threads(target, n):
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_register_history_is_linearizable():
+    recorder = Recorder()
+    register = RecordedRegister(AtomicCell(0), recorder)
+    register.record_initial()
+
+    def worker(i):
+        for k in range(20):
+            register.write(100 * (i + 1) + k)
+            register.compare_and_swap(register.read(), 10_000 * (i + 1) + k)
+
+    run_threads(worker, 3)
+    spec = recorder.history()
+    assert len(spec) == 1 + 3 * 20 * 3
+    assert check(spec).linearizable
+
+
+def test_unwritten_register_needs_its_initial_value():
+    recorder = Recorder()
+    register = RecordedRegister(AtomicCell(5), recorder)
+    register.read()
+    assert not check(recorder.history()).linearizable
+
+    recorder = Recorder()
+    register = RecordedRegister(AtomicCell(5), recorder)
+    register.record_initial()
+    register.read()
+    assert check(recorder.history()).linearizable
+
+
+def test_queue_histories():
+    recorder = Recorder()
+    q = RecordedQueue(queue.Queue(), recorder)
+    run_threads(lambda i: [q.enq(10 * i + k) for k in range(10)], 2)
+    run_threads(lambda i: [q.deq() for _ in range(10)], 2)
+    spec = recorder.history()
+    assert len(spec) == 40 and check(spec).linearizable
+
+    async def main():
+        recorder = Recorder(tasks=True)
+        q = AsyncRecordedQueue(asyncio.Queue(), recorder)
+
+        async def producer(i):
+            for k in range(10):
+                await q.enq(10 * i + k)
+                await asyncio.sleep(0)
+
+        async def consumer():
+            for _ in range(10):
+                await q.deq()
+
+        await asyncio.gather(producer(0), producer(1), consumer(), consumer())
+        return recorder.history()
+
+    spec = asyncio.run(main())
+    assert len(spec) == 40 and check(spec).linearizable
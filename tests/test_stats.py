@@ -0,0 +1,40 @@
+from classes import *
+from checker import check
+from linearize_io import linearize_io
+from linearize_wgl import linearize_wgl
+from utils import linearize_generic
+
+
+def concurrent_writes():
+    return [CallWrite(1, 1, 0, 2), CallWrite(2, 2, 1, 3), CallRead(1, 2, 4, 5)]
+
+
+def test_search_counters():
+    stats = SearchStats()
+    assert linearize_wgl(concurrent_writes(), StateIO(), stats) is not None
+    assert (stats.nodes, stats.cache_hits, stats.max_width, stats.snapshots, stats.state_copies) == (4, 0, 2, 3, 1)
+
+    # every linearization: both orders of the writes are tried
+    stats = SearchStats()
+    assert len(linearize_generic(concurrent_writes(), StateIO(), "all", stats)) == 1
+    assert (stats.nodes, stats.max_width, stats.snapshots, stats.state_copies) == (5, 2, 6, 1)
+
+
+def test_cache_hits():
+    # both orders of the two reads reach the same configuration, the second one is not explored again
+    spec = [CallWrite(1, 1, 0, 1), CallRead(1, 1, 2, 4), CallRead(2, 1, 3, 5), CallRead(1, 9, 6, 7)]
+    stats = SearchStats()
+    assert linearize_wgl(spec, StateIO(), stats) is None
+    assert stats.cache_hits == 1
+
+
+def test_phases():
+    stats = SearchStats()
+    assert linearize_io(concurrent_writes(), stats=stats).linearizable
+    assert {"basic_io_checks", "intra_group_check", "inter_group_check", "make_blocks",
+            "get_false_cas_resolvers"} <= set(stats.phases)
+    assert all(t >= 0 for t in stats.phases.values())
+
+    stats = SearchStats()
+    assert check(concurrent_writes(), stats).stats is stats
+    assert stats.phases and stats.nodes == 0
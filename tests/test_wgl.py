@@ -0,0 +1,32 @@
+import copy
+import random
+from classes import *
+from linearize_io import is_valid_order
+from linearize_wgl import linearize_wgl
+from baseline import linearize_generic as baseline_generic
+from histories import register_specs, queue_spec, iter_testio
+
+
+def check_agreement(spec, state):
+    expected = baseline_generic(copy.deepcopy(spec), state.copy()) is not None
+    order = linearize_wgl(spec, state.copy())
+    assert (order is not None) == expected
+    if order is not None:
+        assert is_valid_order(order, state)
+        assert sorted(c.order for c in spec) == list(range(1, len(spec) + 1))
+
+
+def test_register_agrees_with_baseline():
+    for spec in register_specs(seed=1, count=300) + register_specs(seed=2, count=300, ops=["io", "cas"]):
+        check_agreement(spec, StateIO())
+
+
+def test_queue_agrees_with_baseline():
+    rng = random.Random(1)
+    for _ in range(300):
+        check_agreement(queue_spec(rng, n=3, m=rng.randint(2, 7), p=3), StateQueue())
+
+
+def test_labelled_histories():
+    for spec, label in iter_testio(500):
+        assert (linearize_wgl(spec, StateIO()) is not None) == label
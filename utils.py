@@ -1,4 +1,4 @@
-from typing import Dict, DefaultDict, Optional, List, Set, Any, Tuple
+from typing import Dict, DefaultDict, Optional, List, Set, Any, Tuple, Iterator, Callable
 from dataclasses import dataclass
 from collections import defaultdict
 import matplotlib.pyplot as plt
@@ -7,10 +7,10 @@ import random
 import copy
 import tqdm
 import pickle
-import import_ipynb
 import math
 import os
 import linearize_io_helper as io_helper
+from interval_index import any_overlap
 
 
 def sort_by_thread(spec: List[Call]):
@@ -51,14 +51,37 @@ def visualize_history(spec: List[Call]):
     plt.show()
 
 
-def linearize_generic(spec: List[Call], state: State):
+def iter_linearizations(
+        spec: List[Call], state: State, reduce: bool = False, stats: Optional[SearchStats] = None,
+        should_stop: Optional[Callable[[], bool]] = None) -> Iterator[List[Call]]:
+    """
+    Lazily yields the valid linearizations of spec one at a time\n
+    The search state is a tuple of per thread cursors, and the state is undone with
+    snapshot/restore after every candidate instead of being copied for every branch.\n
+    With reduce, interleavings that only swap calls that commute (see Call.commutes) are skipped with sleep sets:
+    a candidate whose sibling branch was already explored first stays asleep as long as the calls taken commute with it.
+    At least one linearization is still yielded if there is any, but not all of them.\n
+    stats counts the nodes, the widest candidate set, the snapshots and the state copies.\n
+    should_stop is polled at every node, the search raises SearchCancelled once it returns True.
+    """
     threads: DefaultDict[int, List[Call]] = sort_by_thread(spec)
-
-    def helper(threads: DefaultDict[int, List[Call]], state: State):
-        res: List[List[Call]] = []
-        first_op_per_thread = [t[0] for t in threads.values() if t]
+    # sort threads by the start time of the first operation
+    for t in threads.values():
+        t.sort(key=lambda x: x.start)
+    thread_lists = list(threads.values())
+    thread_index = {threadno: i for i, threadno in enumerate(threads)}
+    path: List[Call] = []
+
+    def node(cursors: Tuple[int, ...], state: State, sleep: Tuple[Call, ...]) -> Optional[List[Any]]:
+        """
+        frame of the search node [cursors, state, sleep, candidates, next candidate, snapshot,
+        whether a candidate is explored], or None if everything is linearized
+        """
+        if should_stop is not None and should_stop():
+            raise SearchCancelled()
+        first_op_per_thread = [t[i] for t, i in zip(thread_lists, cursors) if i < len(t)]
         if not first_op_per_thread:
-            return res
+            return None
         ref = first_op_per_thread.pop()
         candidates: List[Call] = [ref]
         while first_op_per_thread:
@@ -77,44 +100,96 @@ def linearize_generic(spec: List[Call], state: State):
                 # other 2 cases are when op starts before ref ends, and when op ends after ref ends
                 candidates.append(op)
 
-        # now we just pop a candidate an proceed by recursion
-        # print(f'candidates: {candidates}')
-        for c in candidates:
-            # print(f'candidate: {c}')
-
-            new_state = state.copy()
-            optional_state = c.exec(new_state)
-            if optional_state is not None:
-                new_state, _ = optional_state
-            else:
+        if stats is not None:
+            stats.nodes += 1
+            stats.max_width = max(stats.max_width, len(candidates))
+        return [cursors, state, sleep, candidates, 0, None, False]
+
+    # the search works on its own copy, as it may be abandoned halfway by the consumer
+    if stats is not None:
+        stats.state_copies += 1
+    root = node((0,) * len(thread_lists), state.copy(), ())
+    if root is None:
+        yield []
+        return
+
+    # depth first with an explicit stack of frames instead of recursion, so that the depth is not bounded by
+    # the recursion limit. A frame with a candidate explored below it undoes it from its snapshot when it is back on top.
+    stack: List[List[Any]] = [root]
+    while stack:
+        frame = stack[-1]
+        cursors, state, sleep, candidates, i, snapshot, explored = frame
+        if explored:
+            path.pop()
+            state.restore(snapshot)
+            frame[6] = False
+            if reduce:
+                sleep += (candidates[i - 1],)
+                frame[2] = sleep
+
+        # now we just take the next candidate and go one level deeper
+        while i < len(candidates):
+            c = candidates[i]
+            i += 1
+            if any(c is z for z in sleep):
                 continue
+            if stats is not None:
+                stats.snapshots += 1
+            snapshot = state.snapshot()
+            optional_state = c.exec(state)
+            if optional_state is None:
+                state.restore(snapshot)
+                continue
+            new_state, _ = optional_state
+
+            t = thread_index[c.threadno]
+            path.append(c)
+            frame[4:] = i, snapshot, True
+            child_sleep = tuple(z for z in sleep if z.commutes(c)) if reduce else ()
+            child = node(cursors[:t] + (cursors[t] + 1,) + cursors[t + 1:], new_state, child_sleep)
+            if child is None:
+                # everything is linearized, c is undone on the next round
+                yield path.copy()
+            else:
+                stack.append(child)
+            break
+        else:
+            stack.pop()
 
-            threads_copy = copy.deepcopy(threads)
-
-            threads_copy[c.threadno].pop(0)
-            sol = helper(threads_copy, new_state)
-            if sol is not None:
-                # since sol is a list of solutions, we need to add the current candidate to all of them
-                # two cases:
-                # 1. sol is empty, then we just add the candidate
-                # 2. sol is not empty, then we add the candidate to all of them
-                if sol == []:
-                    res.append([c])
-                else:
-                    for s in sol:
-                        s.insert(0, c)
-                    res.extend(sol)
-
-        if not res:
-            return None
-        return res
 
-    # sort threads by the start time of the first operation
-    for t in threads.values():
-        t.sort(key=lambda x: x.start)
-    ret = helper(threads, state)
-    if ret is None:
-        return ret
+def linearize_generic(
+        spec: List[Call], state: State, mode: str = "all", stats: Optional[SearchStats] = None,
+        should_stop: Optional[Callable[[], bool]] = None):
+    """
+    mode = "all": returns the list of all linearizations, or None if there is none\n
+    mode = "witness": returns the first linearization found, or None if there is none\n
+    mode = "decide": returns whether the history is linearizable\n
+    The search stops at the first linearization for "witness" and "decide".\n
+    stats and should_stop are passed to iter_linearizations, which raises SearchCancelled once should_stop returns True
+    (see checker.Budget).
+    """
+    if mode not in ("all", "witness", "decide"):
+        raise ValueError(f"Unknown mode {mode}")
+
+    # a single linearization is needed unless all of them are asked for
+    linearizations = iter_linearizations(spec, state, reduce=mode != "all", stats=stats, should_stop=should_stop)
+    if mode == "decide":
+        return next(linearizations, None) is not None
+
+    if mode == "witness":
+        witness = next(linearizations, None)
+        if witness is None:
+            return None
+        for j in range(len(witness)):
+            witness[j].order = j + 1
+        return witness
+
+    ret = list(linearizations)
+    if not spec:
+        # as before the lazy search, the empty history gives an empty list rather than its one empty linearization
+        return []
+    if not ret:
+        return None
     for i in range(len(ret)):
         for j in range(len(ret[i])):
             ret[i][j].order = j + 1
@@ -219,12 +294,12 @@ def generate_tests(
             if isAny_fcas_intersect_write_comb(spec):
                 continue
 
-            sol = linearize_generic(spec, StateIO())
-            if sol is None and fail < total * (1 - success_percentage):
+            sol = linearize_generic(spec, StateIO(), mode="decide")
+            if not sol and fail < total * (1 - success_percentage):
                 fail += 1
                 pickle.dump((spec, False), f)
                 loading.update()
-            elif sol is not None and success < total * success_percentage:
+            elif sol and success < total * success_percentage:
                 success += 1
                 pickle.dump((spec, True), f)
                 loading.update()
@@ -239,22 +314,28 @@ def save_test(test: List[Tuple[List[Call], bool]], filename: str):
             pickle.dump(t, f)
 
 
-def load_test(filename: str) -> List[Tuple[List[Call], bool]]:
+def iter_test(filename: str) -> Iterator[Tuple[List[Call], bool]]:
+    """
+    Streams the test cases of a file one at a time, without loading the whole file
+    """
     if not os.path.exists(f"tests/{filename}"):
         raise FileNotFoundError(f"tests/{filename} not found")
 
     if not filename.endswith(".pkl"):
         raise ValueError(f"File {filename} is not a pickle file")
 
-    loader = tqdm.tqdm()
     with open(f"tests/{filename}", "rb") as f:
-        test = []
         while True:
             try:
-                test.append(pickle.load(f))
-                loader.update()
+                yield pickle.load(f)
             except EOFError:
                 break
+
+
+def load_test(filename: str) -> List[Tuple[List[Call], bool]]:
+    test = []
+    for t in tqdm.tqdm(iter_test(filename)):
+        test.append(t)
     return test
 
 
@@ -276,11 +357,7 @@ def isIntervals_strictly_ordered(spec: List[Call]):
     sort_by_var = defaultdict(list)
     io_helper.populate_call_bins(spec, sort_by_var, [], [])
     intervals = io_helper.make_intervals(sort_by_var)
-    for var_i, i in intervals.items():
-        for var_j, j in intervals.items():
-            if i.isIntersecting(j) and var_i != var_j:
-                return False
-    return True
+    return not any_overlap(list(intervals.values()))
 
 
 def isRead_before_cas(spec: List[Call]):